@@ -0,0 +1,27 @@
+"""add posts created_at id index
+
+Revision ID: 3f9a1c2d7e4b
+Revises: 76b532cec3d7
+Create Date: 2026-10-18 09:12:40.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2d7e4b'
+down_revision: Union[str, None] = '76b532cec3d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Composite index backing the keyset pagination order of GET /posts
+    op.create_index('ix_posts_created_at_id', 'posts', [sa.text('created_at DESC'), sa.text('id DESC')])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_posts_created_at_id', table_name='posts')
@@ -0,0 +1,53 @@
+"""add posts vote count
+
+Revision ID: 5b7d2e0f9a13
+Revises: c41e8a9b0d27
+Create Date: 2026-10-18 11:26:07.931845
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7d2e0f9a13'
+down_revision: Union[str, None] = 'c41e8a9b0d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('vote_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION posts_vote_count_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE posts SET vote_count = vote_count + 1 WHERE id = NEW.post_id;
+            ELSE
+                UPDATE posts SET vote_count = vote_count - 1 WHERE id = OLD.post_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER votes_vote_count_sync
+        AFTER INSERT OR DELETE ON votes
+        FOR EACH ROW EXECUTE FUNCTION posts_vote_count_sync()
+    """)
+
+    # Backfill existing posts, votes is locked by the trigger creation until commit
+    op.execute("""
+        UPDATE posts SET vote_count = counts.actual
+        FROM (SELECT post_id, count(*) AS actual FROM votes GROUP BY post_id) AS counts
+        WHERE posts.id = counts.post_id
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER votes_vote_count_sync ON votes")
+    op.execute("DROP FUNCTION posts_vote_count_sync()")
+    op.drop_column('posts', 'vote_count')
@@ -0,0 +1,37 @@
+"""add post trending
+
+Revision ID: 9d3e6f1a2b74
+Revises: e8a06b4c1f52
+Create Date: 2026-10-18 17:05:52.614380
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3e6f1a2b74'
+down_revision: Union[str, None] = 'e8a06b4c1f52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by the trending refresher, which rebuilds it in full when the application starts
+    op.create_table('post_trending',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('vote_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id')
+    )
+    # Top-N lookup of GET /posts/trending
+    op.create_index('ix_post_trending_score', 'post_trending', [sa.text('score DESC'), sa.text('post_id DESC')])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_post_trending_score', table_name='post_trending')
+    op.drop_table('post_trending')
@@ -0,0 +1,31 @@
+"""add posts owner_id created_at id index
+
+Revision ID: b6c4d8e2f019
+Revises: 9d3e6f1a2b74
+Create Date: 2026-10-18 18:22:37.409125
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6c4d8e2f019'
+down_revision: Union[str, None] = '9d3e6f1a2b74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per-author feed of GET /users/{user_id}/posts, in the keyset pagination order.
+    # Built concurrently (outside the migration transaction) so posts stay writable on large tables.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_posts_owner_id_created_at_id', 'posts',
+                        ['owner_id', sa.text('created_at DESC'), sa.text('id DESC')], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_owner_id_created_at_id', table_name='posts', postgresql_concurrently=True)
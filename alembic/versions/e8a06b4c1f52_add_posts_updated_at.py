@@ -0,0 +1,27 @@
+"""add posts updated at
+
+Revision ID: e8a06b4c1f52
+Revises: 5b7d2e0f9a13
+Create Date: 2026-10-18 13:41:19.276503
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a06b4c1f52'
+down_revision: Union[str, None] = '5b7d2e0f9a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows start at the migration time, the application bumps it on every update
+    op.add_column('posts', sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('posts', 'updated_at')
@@ -0,0 +1,4 @@
+import time
+
+# When the app package started importing, the reference point of the startup timings
+IMPORT_STARTED = time.perf_counter()
@@ -0,0 +1,326 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import sys
+from enum import Enum
+from typing import Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------
+# Bulk Post Import (NDJSON or CSV)
+# Used by POST /posts/bulk and by the CLI:
+# python -m app.bulk_import FILE --owner-id ID [--format csv]
+# ---------------------------------------------------
+
+# A record longer than this (no newline, or an unterminated CSV quote) aborts the import
+MAX_RECORD_CHARS = 1_000_000
+
+# Columns written for every imported post, the rest come from server defaults
+COLUMNS = ("title", "content", "published", "owner_id")
+
+# Rows per multi-row INSERT of the fallback path, asyncpg binds at most 32767 parameters per statement
+INSERT_BATCH_ROWS = 32767 // len(COLUMNS)
+
+class ImportAborted(ValueError):
+    """
+    Raised when the input cannot be split into records at all, the rows before it are kept.
+    """
+
+class ImportFormat(str, Enum):
+    """
+    Input formats of the bulk import.
+
+    - **ndjson**: One JSON object per line
+    - **csv**: A header line naming the columns (`title`, `content`, optional `published`), then one post per record
+    """
+    ndjson = "ndjson"
+    csv = "csv"
+
+class RecordReader:
+    """
+    Splits streamed text into rows without holding more than one record.
+
+    Text is fed in arbitrary pieces (network chunks, file lines). Each complete
+    record comes out as `(line, row, error)`: `row` is a dict when it parsed,
+    otherwise `error` says why. CSV records may span lines inside quotes.
+    """
+
+    def __init__(self, format: ImportFormat):
+        self.format = ImportFormat(format)
+        self.header = None
+        self._buffer = ""  # Text after the last newline
+        self._record = []  # Lines of a CSV record still inside quotes
+        self._record_chars = 0
+        self._record_line = 0
+        self._line = 0
+
+    def feed(self, text: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        if len(self._buffer) > MAX_RECORD_CHARS:
+            raise ImportAborted(f"Line {self._line + len(lines) + 1} is longer than {MAX_RECORD_CHARS} characters")
+        for line in lines:
+            yield from self._parse_line(line)
+
+    def finish(self) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+        """
+        Parses the last line when the input does not end with a newline.
+        """
+        if self._buffer:
+            line, self._buffer = self._buffer, ""
+            yield from self._parse_line(line)
+        if self._record:
+            self._record, self._record_chars = [], 0
+            yield self._record_line, None, "Unterminated quoted field"
+
+    def _parse_line(self, line: str):
+        self._line += 1
+        line = line.removesuffix("\r")
+        if self.format == ImportFormat.ndjson:
+            yield from self._parse_json(line)
+        else:
+            yield from self._parse_csv(line)
+
+    def _parse_json(self, line: str):
+        if not line.strip():
+            return
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield self._line, None, f"Invalid JSON: {exc}"
+            return
+        if not isinstance(row, dict):
+            yield self._line, None, "Expected a JSON object"
+            return
+        yield self._line, row, None
+
+    def _parse_csv(self, line: str):
+        if not self._record:
+            self._record_line = self._line
+        self._record.append(line)
+        self._record_chars += len(line) + 1
+        if _ends_in_quotes(line, quoted=len(self._record) > 1):
+            # Inside a quoted field, the record continues on the next line
+            if self._record_chars > MAX_RECORD_CHARS:
+                raise ImportAborted(f"Record on line {self._record_line} is longer than {MAX_RECORD_CHARS} characters")
+            return
+        text = "\n".join(self._record)
+        self._record, self._record_chars = [], 0
+
+        try:
+            values = next(csv.reader([text]), [])
+        except csv.Error as exc:
+            yield self._record_line, None, f"Invalid CSV: {exc}"
+            return
+        if not any(value.strip() for value in values):
+            return  # Blank line
+        if self.header is None:
+            self.header = [name.strip() for name in values]
+            return
+        if len(values) != len(self.header):
+            yield self._record_line, None, f"Expected {len(self.header)} columns, got {len(values)}"
+            return
+        row = dict(zip(self.header, values))
+        if row.get("published") == "":
+            del row["published"]  # Empty cell means the schema default
+        yield self._record_line, row, None
+
+def _ends_in_quotes(line: str, quoted: bool) -> bool:
+    """
+    Returns whether a CSV line ends inside a quoted field, `quoted` tells if it starts in one.
+
+    Follows the csv module: a quote opens a quoted field only at the start of a field,
+    elsewhere it is a literal character (`5" screen`), and `""` inside one is an escaped quote.
+    """
+    field_start, closed = not quoted, False
+    for char in line:
+        if quoted:
+            if char == '"':
+                quoted, closed = False, True
+            continue
+        if char == '"' and (field_start or closed):
+            quoted = True  # Opens a quoted field, or `""` escapes a quote in one
+        field_start, closed = char == ",", False
+    return quoted
+
+def _format_errors(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+
+def _copy_rows(db: Session, rows: List[dict]) -> bool:
+    """
+    Writes the rows with PostgreSQL `COPY ... FROM STDIN` in the session's transaction.
+
+    Returns:
+        bool: False if the driver has no COPY support (e.g. asyncpg), nothing was written.
+    """
+    dbapi_connection = db.connection().connection.dbapi_connection
+    cursor = dbapi_connection.cursor()
+    if not hasattr(cursor, "copy_expert"):
+        cursor.close()
+        return False
+
+    data = io.StringIO()
+    writer = csv.writer(data, quoting=csv.QUOTE_NONNUMERIC)  # Quoted so an empty string is not read as NULL
+    for row in rows:
+        writer.writerow([row[column] for column in COLUMNS])
+    data.seek(0)
+    try:
+        cursor.copy_expert(f"COPY {models.Post.__tablename__} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", data)
+    finally:
+        cursor.close()
+    return True
+
+def write_rows(db: Session, rows: List[dict], use_copy: bool = True):
+    """
+    Inserts a chunk of validated posts, with COPY when the driver supports it and
+    multi-row INSERTs of at most `INSERT_BATCH_ROWS` rows otherwise. Does not commit.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        rows (List[dict]): Values for every column of `COLUMNS`.
+        use_copy (bool): Try COPY first.
+    """
+    if not rows:
+        return
+    if use_copy and _copy_rows(db, rows):
+        return
+    for start in range(0, len(rows), INSERT_BATCH_ROWS):
+        db.execute(insert(models.Post).values(rows[start:start + INSERT_BATCH_ROWS]))
+
+class BulkImport:
+    """
+    Validates rows with `schemas.PostCreate`, groups them into chunks and keeps the report.
+
+    Only the current chunk and the first `max_errors` failures are held in memory,
+    so memory use does not depend on the size of the input.
+
+    Attributes:
+        imported (int): Rows committed so far.
+        failed (int): Rows rejected so far.
+        errors (List[dict]): `{"line", "error"}` of the first `max_errors` rejected rows.
+    """
+
+    def __init__(self, owner_id: int, chunk_size: int, max_errors: int, use_copy: bool = True):
+        self.owner_id = owner_id
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.use_copy = use_copy
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self._lines = []
+        self._rows = []
+
+    def fail(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": error})
+
+    def add(self, line: int, row: Optional[dict], error: Optional[str] = None) -> bool:
+        """
+        Validates one parsed row and queues it for the current chunk.
+
+        Returns:
+            bool: True when the chunk is full and `flush` should be called.
+        """
+        if error is not None:
+            self.fail(line, error)
+            return False
+        try:
+            post = schemas.PostCreate.model_validate(row)
+        except ValidationError as exc:
+            self.fail(line, _format_errors(exc))
+            return False
+        self._lines.append(line)
+        self._rows.append({**post.model_dump(), "owner_id": self.owner_id})
+        return len(self._rows) >= self.chunk_size
+
+    def flush(self, db: Session):
+        """
+        Writes and commits the current chunk. A chunk the database rejects is rolled
+        back and each of its rows is reported as failed.
+        """
+        if not self._rows:
+            return
+        lines, rows = self._lines, self._rows
+        self._lines, self._rows = [], []
+        try:
+            write_rows(db, rows, self.use_copy)
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            logger.warning("Bulk import chunk of %d rows failed: %s", len(rows), exc)
+            message = f"Database error: {str(exc).splitlines()[0]}"
+            for line in lines:
+                self.fail(line, message)
+            return
+        self.imported += len(rows)
+
+    def result(self) -> dict:
+        return {"imported": self.imported, "failed": self.failed, "errors": self.errors}
+
+def import_file(db: Session, stream, owner_id: int, format: ImportFormat, chunk_size: int, max_errors: int) -> dict:
+    """
+    Imports posts from a text stream, committing every `chunk_size` rows.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        stream: Text file object to read from.
+        owner_id (int): Owner of the imported posts.
+        format (ImportFormat): Format of the input.
+
+    Returns:
+        dict: The import report, see `schemas.BulkImportResult`.
+    """
+    reader = RecordReader(format)
+    importer = BulkImport(owner_id, chunk_size, max_errors)
+    for text in stream:
+        for record in reader.feed(text):
+            if importer.add(*record):
+                importer.flush(db)
+    for record in reader.finish():
+        importer.add(*record)
+    importer.flush(db)
+    return importer.result()
+
+def main(argv=None) -> int:
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m app.bulk_import", description="Import posts from NDJSON or CSV.")
+    parser.add_argument("file", help="Input file, - for stdin.")
+    parser.add_argument("--owner-id", type=int, required=True, help="User that will own the imported posts.")
+    parser.add_argument("--format", type=ImportFormat, choices=list(ImportFormat), help="Input format (default: from the file extension, else ndjson).")
+    parser.add_argument("--chunk-size", type=int, default=settings.bulk_import_chunk_size, help="Rows per COPY and commit.")
+    parser.add_argument("--max-errors", type=int, default=settings.bulk_import_max_errors, help="Failed rows to print.")
+    args = parser.parse_args(argv)
+
+    format = args.format or (ImportFormat.csv if args.file.lower().endswith(".csv") else ImportFormat.ndjson)
+    stream = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8-sig", newline="")
+    db = SessionLocal()
+    try:
+        report = import_file(db, stream, args.owner_id, format, args.chunk_size, args.max_errors)
+    except ImportAborted as exc:
+        print(f"import aborted: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        db.close()
+        if stream is not sys.stdin:
+            stream.close()
+
+    for error in report["errors"]:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+    print(f"imported {report['imported']} post(s), {report['failed']} failed")
+    return 1 if report["failed"] else 0  # Non-zero so scripted migrations notice rejected rows
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# ---------------------------------------------------
+# Bounded In-Process LRU Cache with Expiry
+# ---------------------------------------------------
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a time-to-live.
+
+    Attributes:
+        maxsize (int): Maximum number of entries, the least recently used one is evicted first.
+        ttl (float): Default lifetime of an entry in seconds.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that found no live entry.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the live value stored under `key`, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]  # Expired
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Stores `value` under `key` for `ttl` seconds (default: the cache TTL).
+        """
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """
+        Drops the entry stored under `key`, if any.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Drops every entry and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the size and hit/miss counters of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+class ExpiringSet:
+    """
+    Thread-safe set whose members are forgotten once their expiry passes.
+
+    Unlike `TTLCache` it never evicts live members, so it is safe for
+    security decisions such as token revocation. Members expire lazily: a
+    min-heap of expiries lets each `add` drop only the members that are due,
+    in O(log n), and lookups ignore (and drop) expired members.
+    """
+
+    def __init__(self):
+        self._members = {}  # key -> expires_at
+        self._expiries = []  # Heap of (expires_at, sequence, key), stale once the key is re-added
+        self._sequence = itertools.count()  # Tie breaker, keys need not be comparable
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float):
+        # Caller holds self._lock
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, _, key = heapq.heappop(self._expiries)
+            if self._members.get(key) == expires_at:  # Not re-added with a later expiry
+                del self._members[key]
+
+    def add(self, key: Hashable, ttl: float):
+        """
+        Adds `key` for `ttl` seconds.
+        """
+        now = time.monotonic()
+        expires_at = now + ttl
+        with self._lock:
+            self._purge(now)
+            self._members[key] = expires_at
+            heapq.heappush(self._expiries, (expires_at, next(self._sequence), key))
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            expires_at = self._members.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._members[key]  # Its heap entry is skipped when popped
+                return False
+            return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge(time.monotonic())
+            return len(self._members)
+
+    def clear(self):
+        """
+        Forgets every member.
+        """
+        with self._lock:
+            self._members.clear()
+            self._expiries.clear()
@@ -0,0 +1,55 @@
+import hashlib
+from typing import Iterable
+
+from fastapi import Request
+
+# ---------------------------------------------------
+# ETag / If-None-Match Helpers for Conditional GETs
+# ---------------------------------------------------
+
+def post_version(post, votes: int) -> str:
+    """
+    Returns the version string of a post: it changes whenever the post is
+    edited (`updated_at`) or voted on.
+
+    Args:
+        post (models.Post): The loaded post.
+        votes (int): The vote count sent with the post.
+    """
+    return f"{post.id}:{post.updated_at.isoformat()}:{votes}"
+
+def make_etag(versions: Iterable[str]) -> str:
+    """
+    Builds a strong ETag from one or more version strings.
+
+    Args:
+        versions (Iterable[str]): Versions of every item in the response, in response order.
+
+    Returns:
+        str: The quoted ETag header value.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for version in versions:
+        digest.update(version.encode())
+        digest.update(b"|")
+    return f'"{digest.hexdigest()}"'
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Checks the request's `If-None-Match` header against the current ETag.
+
+    Args:
+        request (Request): The incoming request.
+        etag (str): The current ETag of the resource.
+
+    Returns:
+        bool: True if the client's copy is current and a 304 should be sent.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in candidates
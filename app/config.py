@@ -1,3 +1,5 @@
+from typing import List, Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 # ----------------------------------------------------
@@ -17,6 +19,56 @@ class Settings(BaseSettings):
         database_username (str): Username for the PostgreSQL database.
         database_password (str): Password for the PostgreSQL database.
         database_name (str): Name of the PostgreSQL database.
+        database_async (bool): Serve requests through the asyncpg driver and AsyncSession instead of psycopg2.
+        database_pool_mode (str): "queue" for a pooled engine, "null" to open a connection per checkout (PgBouncer transaction mode).
+        database_pool_size (int): Connections kept open by the pool.
+        database_max_overflow (int): Extra connections allowed above the pool size under load.
+        database_pool_timeout (float): Seconds to wait for a free connection before failing.
+        database_pool_recycle (int): Replace connections older than this many seconds (-1 disables).
+        database_pool_pre_ping (bool): Test connections with a round trip on checkout.
+        database_pool_use_lifo (bool): Reuse the most recently returned connection so idle ones can time out.
+        database_replica_urls (List[str]): PostgreSQL URLs of read replicas, a JSON list (empty serves reads from the primary).
+        database_replica_check_interval_seconds (float): Seconds between replica health checks.
+        read_your_writes_seconds (float): Seconds after a successful write during which the same client reads from the primary.
+        startup_schema_mode (str): What each worker does to the schema at startup: "create_all" missing tables,
+            "check" that the database is at the Alembic head (fails the boot otherwise), or "off".
+        post_owner_loading (str): "joined" or "selectin" eager loading of post owners in the post routers.
+        user_cache_enabled (bool): Cache the authenticated user lookup in process.
+        user_cache_size (int): Maximum number of cached users.
+        user_cache_ttl_seconds (float): Seconds a cached user is trusted before it is reloaded.
+        token_cache_size (int): Maximum number of verified JWTs kept in process (0 disables the cache).
+        hashing_executor (str): "thread" or "process" pool used for bcrypt hashing and verification.
+        hashing_max_workers (int): Number of bcrypt calls that run in parallel.
+        hashing_max_pending (int): Calls allowed in flight (queued or running) before new ones get a 503.
+        hashing_queue_timeout_seconds (float): Seconds a call may wait for a worker before it gets a 503.
+        rate_limit_enabled (bool): Throttle login and signup attempts with token buckets before any hashing or DB access.
+        rate_limit_ip_burst (int): Attempts a client IP may make at once. The client IP is the connection's peer:
+            behind a reverse proxy or load balancer every client shares the proxy's bucket unless the proxy is
+            listed in `rate_limit_trusted_proxies`.
+        rate_limit_ip_per_second (float): Rate at which a client IP earns attempts back.
+        rate_limit_account_burst (int): Attempts allowed at once per username or email, from any IP.
+        rate_limit_account_per_second (float): Rate at which a username or email earns attempts back.
+        rate_limit_max_keys (int): Buckets kept by the in-process backend, the least recently used are dropped first.
+        rate_limit_trusted_proxies (List[str]): Addresses or CIDR networks of the reverse proxies in front of the app, a JSON
+            list. Requests they forward are limited by the client address they append to `X-Forwarded-For`.
+        rate_limit_redis_url (Optional[str]): Redis URL to share the buckets between workers (needs the `redis` package).
+        vote_write_behind (bool): Buffer votes in process and write them in periodic batches.
+        vote_flush_interval_ms (int): Milliseconds between write-behind flushes.
+        vote_flush_max_items (int): Pending votes that trigger an early flush.
+        trending_enabled (bool): Keep the post_trending ranking up to date in a background thread (one worker at a time refreshes).
+        trending_refresh_interval_seconds (float): Seconds between incremental refreshes of the ranking.
+        trending_window_hours (float): Only posts created within this many hours can trend.
+        trending_half_life_hours (float): Age after which a post needs twice the votes to rank the same.
+        trending_max_limit (int): Most posts GET /posts/trending returns at once.
+        bulk_import_chunk_size (int): Rows written (and committed) per chunk by the bulk post import.
+        bulk_import_max_errors (int): Failed rows listed in a bulk import report, the rest are only counted.
+        export_chunk_rows (int): Rows fetched from the server-side cursor and written per chunk by the post export.
+        internal_endpoints_enabled (bool): Serve the /internal diagnostics endpoints. They are unauthenticated,
+            only enable them where the port is not reachable by clients.
+        metrics_enabled (bool): Record per-route request metrics and serve them on /metrics.
+        sql_stats_enabled (bool): Count statements, DB time and rows per request, sent in the Server-Timing header.
+        sql_repeat_threshold (int): Times a request may run the same statement before it counts as an N+1.
+        sql_repeat_mode (str): "off", "warn" to log repeated statements, or "raise" to fail the request (for tests and CI).
         secret_key (str): Secret key used for JWT encoding.
         algorithm (str): Algorithm used for JWT (e.g., HS256).
         access_token_expire_minutes (str): Expiry duration (in minutes) for access tokens.
@@ -28,12 +80,81 @@ class Settings(BaseSettings):
     database_username: str = "postgres"
     database_password: str = "root"
     database_name: str
+    database_async: bool = False
+
+    # Connection pool configuration
+    database_pool_mode: Literal["queue", "null"] = "queue"
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30.0
+    database_pool_recycle: int = -1
+    database_pool_pre_ping: bool = False
+    database_pool_use_lifo: bool = False
+
+    # Read replicas
+    database_replica_urls: List[str] = []
+    database_replica_check_interval_seconds: float = 5.0
+    read_your_writes_seconds: float = 5.0
 
     # JWT and token settings
     secret_key: str
     algorithm: str
     access_token_expire_minutes: str
 
+    # Startup
+    startup_schema_mode: Literal["create_all", "check", "off"] = "create_all"
+
+    # Query strategy
+    post_owner_loading: Literal["joined", "selectin"] = "joined"
+
+    # Verified token and authenticated user caches
+    token_cache_size: int = 10000
+    user_cache_enabled: bool = True
+    user_cache_size: int = 10000
+    user_cache_ttl_seconds: float = 60.0
+
+    # Password hashing executor
+    hashing_executor: Literal["thread", "process"] = "thread"
+    hashing_max_workers: int = 2
+    hashing_max_pending: int = 32
+    hashing_queue_timeout_seconds: float = 2.0
+
+    # Login and signup rate limiting
+    rate_limit_enabled: bool = True
+    rate_limit_ip_burst: int = 20
+    rate_limit_ip_per_second: float = 1.0
+    rate_limit_account_burst: int = 5
+    rate_limit_account_per_second: float = 0.1
+    rate_limit_max_keys: int = 100000
+    rate_limit_trusted_proxies: List[str] = []
+    rate_limit_redis_url: Optional[str] = None
+
+    # Write-behind vote buffer
+    vote_write_behind: bool = False
+    vote_flush_interval_ms: int = 200
+    vote_flush_max_items: int = 1000
+
+    # Trending posts ranking
+    trending_enabled: bool = True
+    trending_refresh_interval_seconds: float = 60.0
+    trending_window_hours: float = 72.0
+    trending_half_life_hours: float = 12.0
+    trending_max_limit: int = 100
+
+    # Bulk post import
+    bulk_import_chunk_size: int = 1000
+    bulk_import_max_errors: int = 100
+
+    # Streaming post export
+    export_chunk_rows: int = 1000
+
+    # Diagnostics
+    internal_endpoints_enabled: bool = False
+    metrics_enabled: bool = True
+    sql_stats_enabled: bool = True
+    sql_repeat_threshold: int = 10
+    sql_repeat_mode: Literal["off", "warn", "raise"] = "off"
+
     class Config:
         """
         Pydantic configuration class.
@@ -1,7 +1,12 @@
-from sqlalchemy import create_engine
+from fastapi import Depends, Request
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import CursorResult, create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from .config import settings
+from .pool import engine_options
+from . import replicas
 
 # -----------------------------------------
 # Database Configuration using SQLAlchemy
@@ -17,13 +22,23 @@ database = settings.database_name      # Name of the target database
 # Construct the SQLAlchemy database URL
 # Format: postgresql://<username>:<password>@<host>:<port>/<database>
 SQLALCHEMY_DATABASE_URL = f"postgresql://{username}:{password}@{ip_host}:{port}/{database}"
+# Same database through the asyncpg driver, used when settings.database_async is enabled
+SQLALCHEMY_ASYNC_DATABASE_URL = f"postgresql+asyncpg://{username}:{password}@{ip_host}:{port}/{database}"
 
-# Create a database engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Create a database engine, pool sizing comes from the database_pool_* settings
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options())
 
 # Create a configured "SessionLocal" class for database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and session factory, only created when enabled so asyncpg stays optional
+async_engine = None
+AsyncSessionLocal = None
+if settings.database_async:
+    async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL, **engine_options(is_async=True))
+    # Objects must stay readable after commit, an async session can't lazy load them
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create a base class for declaring ORM models (i.e., tables)
 Base = declarative_base()
 
@@ -40,3 +55,128 @@ def get_db():
         yield db
     finally:
         db.close()
+
+class SyncSessionAdapter:
+    """
+    Exposes a blocking `Session` through the awaitable `AsyncSession` API.
+
+    Every database round trip runs in the threadpool, so `async def` routers
+    can share one code path for the psycopg2 and asyncpg drivers. Results are
+    fully buffered inside the worker thread, which means eager loaders never
+    touch the database from the event loop.
+    """
+
+    def __init__(self, sync_session: Session):
+        self.sync_session = sync_session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    def expunge(self, instance):
+        self.sync_session.expunge(instance)
+
+    def _execute(self, statement, *args, **kwargs):
+        result = self.sync_session.execute(statement, *args, **kwargs)
+        if isinstance(result, CursorResult) and not result.returns_rows:
+            return result  # INSERT/UPDATE/DELETE without RETURNING, keeps rowcount
+        return result.freeze()()
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self._execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return (await self.execute(statement, *args, **kwargs)).scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        """
+        Calls `fn(session, *args, **kwargs)` with the blocking session, like `AsyncSession.run_sync`.
+        """
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+async def get_async_db():
+    """
+    Dependency that provides an `AsyncSession` on the asyncpg engine.
+
+    Yields:
+        db (AsyncSession): SQLAlchemy async session object.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_sync_session(db: Session = Depends(get_db)):
+    """
+    Dependency that wraps the blocking `get_db` session in a `SyncSessionAdapter`.
+    """
+    return SyncSessionAdapter(db)
+
+# Session dependency used by the routers, both variants expose the AsyncSession API
+get_session = get_async_db if settings.database_async else get_sync_session
+
+async def get_async_read_db(request: Request):
+    """
+    Read-only variant of `get_async_db` that uses a healthy replica when one is configured.
+
+    Yields:
+        db (AsyncSession): Session on a replica, or on the primary, see `replicas.read_session_factory`.
+    """
+    session_factory = replicas.read_session_factory(request) or AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
+
+async def get_sync_read_session(request: Request, db: Session = Depends(get_db)):
+    """
+    Read-only variant of `get_sync_session` that uses a healthy replica when one is configured.
+
+    The primary session from `get_db` is only connected when it is used, so it
+    costs nothing when the read goes to a replica.
+    """
+    session_factory = replicas.read_session_factory(request)
+    if session_factory is None:
+        yield SyncSessionAdapter(db)
+        return
+    replica_db = session_factory()
+    try:
+        yield SyncSessionAdapter(replica_db)
+    finally:
+        await run_in_threadpool(replica_db.close) # Returns the connection, may block on the network
+
+# Session dependency for read-only endpoints, may be served by a read replica
+get_read_session = get_async_read_db if settings.database_async else get_sync_read_session
+
+def get_session_factory():
+    """
+    Dependency that provides the session factory itself, for work that outlives the
+    request's dependencies (e.g. a `StreamingResponse` body, which is sent after
+    `get_db` has closed its session).
+
+    Returns:
+        `AsyncSessionLocal` when settings.database_async is enabled, `SessionLocal` otherwise.
+    """
+    return AsyncSessionLocal if settings.database_async else SessionLocal
+
+def get_read_session_factory(request: Request, session_factory = Depends(get_session_factory)):
+    """
+    Read-only variant of `get_session_factory` that returns a healthy replica's factory when one is configured.
+    """
+    return replicas.read_session_factory(request) or session_factory
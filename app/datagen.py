@@ -0,0 +1,277 @@
+import argparse
+import io
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from sqlalchemy.schema import CreateIndex
+
+from . import models, ultils
+
+# ---------------------------------------------------
+# Synthetic Dataset Generator
+# Usage: python -m app.datagen --users 100000 --posts 2000000 --votes 20000000 [--reset]
+# ---------------------------------------------------
+
+# Password of every generated user, hashed once
+DEFAULT_PASSWORD = "password"
+
+# Words the generated posts are made of, so full-text search has something to match
+VOCABULARY = (
+    "python fastapi postgres index query cache latency vote post user cursor replica pool "
+    "async thread request response token session schema migration search trending export "
+    "import benchmark metric stream batch queue shard lock commit rollback table column"
+).split()
+
+def email_for(user_id: int) -> str:
+    """
+    Returns the email of a generated user, e.g. `user1@example.com`.
+    """
+    return f"user{user_id}@example.com"
+
+def zipf_weights(count: int, exponent: float, rng: random.Random) -> list:
+    """
+    Zipf weights `1 / rank ** exponent`, with the ranks shuffled so popularity is
+    not tied to the ID.
+
+    Returns:
+        list: Weight of each of the `count` items.
+    """
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return [1 / rank ** exponent for rank in ranks]
+
+def vote_counts_for(weights: list, votes: int, cap: int, rng: random.Random) -> list:
+    """
+    Splits `votes` over items in proportion to their weights, at most `cap` each.
+
+    The scale is searched so the capped counts still add up to `votes` (as far as
+    `cap * len(weights)` allows), then fractions are rounded stochastically.
+    """
+    low, high = 0.0, float(votes) / min(weights) if weights else 0.0
+    for _ in range(60):
+        scale = (low + high) / 2
+        if sum(min(weight * scale, cap) for weight in weights) < votes:
+            low = scale
+        else:
+            high = scale
+    counts = []
+    for weight in weights:
+        expected = min(weight * high, cap)
+        counts.append(int(expected) + (rng.random() < expected - int(expected)))
+    return counts
+
+def _skip_triggers(connection) -> bool:
+    """
+    Turns off every trigger, foreign key checks included, for the current transaction.
+
+    Generated rows only reference each other, so the checks can't fail. This needs
+    superuser rights, otherwise nothing changes and False is returned.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT skip_triggers")
+        cursor.execute("SET LOCAL session_replication_role = replica")
+        return True
+    except Exception:
+        cursor.execute("ROLLBACK TO SAVEPOINT skip_triggers")
+        return False
+    finally:
+        cursor.close()
+
+def _copy(connection, table: str, columns: tuple, rows, chunk_rows: int) -> int:
+    """
+    Streams tab separated rows into `table` with COPY, `chunk_rows` rows per round trip.
+
+    Generated values never contain tabs, newlines or backslashes, so no escaping is needed.
+    """
+    cursor = connection.cursor()
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    total = 0
+    buffer = io.StringIO()
+    try:
+        for row in rows:
+            buffer.write("\t".join(map(str, row)))
+            buffer.write("\n")
+            total += 1
+            if total % chunk_rows == 0:
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+                buffer = io.StringIO()
+        if buffer.tell():
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+    finally:
+        cursor.close()
+    return total
+
+def _next_id(connection, table) -> int:
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT coalesce(max(id), 0) + 1 FROM {table}")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+def _sync_sequence(connection, table: str):
+    # Rows were copied with explicit IDs, move the serial past them
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))")
+    finally:
+        cursor.close()
+
+def generate(engine, users: int, posts: int, votes: int, seed: int = 42, user_skew: float = 1.0,
+             vote_skew: float = 1.1, days: int = 365, until: datetime = datetime(2025, 1, 1, tzinfo=timezone.utc),
+             password: str = DEFAULT_PASSWORD, chunk_rows: int = 100_000, log=print) -> dict:
+    """
+    Appends a deterministic dataset: the same arguments always produce the same rows.
+
+    - Posts per user are heavy tailed: owners are drawn with Zipf weights (`user_skew`).
+    - Votes per post are Zipfian (`vote_skew`), each post gets distinct voters, so
+      `(user_id, post_id)` never collides.
+    - `posts.vote_count` is written with the posts and the vote trigger is disabled
+      while votes are copied, so counts stay exact without one UPDATE per vote.
+      As a superuser, foreign key checks are skipped as well.
+    - The post indexes are dropped during the load and rebuilt once at the end.
+
+    Each table is loaded in its own transaction. Generated users, posts and votes
+    only reference each other, existing rows are left alone.
+
+    Args:
+        engine: SQLAlchemy engine on the psycopg2 driver (COPY is required).
+        users (int): Users to create, all with the password `password`, hashed once.
+        posts (int): Posts to create.
+        votes (int): Approximate number of votes to create (capped at `users` per post).
+        seed (int): Random seed.
+        days (int): Posts are spread over the `days` before `until`.
+
+    Returns:
+        dict: Number of users, posts and votes created.
+    """
+    rng = random.Random(seed)
+    password_hash = ultils.hash(password)
+    raw = engine.raw_connection()
+    try:
+        # Users
+        started = time.perf_counter()
+        first_user = _next_id(raw, "users")
+        user_ids = range(first_user, first_user + users)
+        signup_span = days * 86400
+        created = _copy(raw, "users", ("id", "email", "password", "created_at"), (
+            (user_id, email_for(user_id), password_hash, (until - timedelta(seconds=rng.randrange(signup_span))).isoformat())
+            for user_id in user_ids
+        ), chunk_rows)
+        _sync_sequence(raw, "users")
+        raw.commit()
+        log(f"users: {created} in {time.perf_counter() - started:.1f}s")
+
+        # Vote counts are decided up front so posts can be written with their final vote_count
+        started = time.perf_counter()
+        vote_counts = vote_counts_for(zipf_weights(posts, vote_skew, rng), votes, users, rng)
+
+        first_post = _next_id(raw, "posts")
+        owner_weights = list(accumulate(zipf_weights(users, user_skew, rng)))
+        owners = rng.choices(user_ids, cum_weights=owner_weights, k=posts)
+        post_span = days * 86400
+
+        def post_rows():
+            for index in range(posts):
+                created_at = (until - timedelta(seconds=rng.randrange(post_span))).isoformat()
+                words = rng.choices(VOCABULARY, k=min(int(rng.paretovariate(1.5) * 15), 1000))  # Heavy tailed, ~45 words on average
+                yield (
+                    first_post + index,
+                    " ".join(words[:rng.randint(3, 8)]).capitalize(),
+                    " ".join(words),
+                    "f" if rng.random() < 0.05 else "t",
+                    owners[index],
+                    created_at,
+                    created_at,
+                    vote_counts[index],
+                )
+
+        indexes = list(models.Post.__table__.indexes)
+        _skip_triggers(raw)  # Owner foreign key checks
+        cursor = raw.cursor()
+        for index in indexes:
+            cursor.execute(f"DROP INDEX IF EXISTS {index.name}")
+        cursor.close()
+        created = _copy(raw, "posts", ("id", "title", "content", "published", "owner_id", "created_at", "updated_at", "vote_count"), post_rows(), chunk_rows)
+        _sync_sequence(raw, "posts")
+        log(f"posts: {created} in {time.perf_counter() - started:.1f}s, rebuilding indexes")
+        started = time.perf_counter()
+        cursor = raw.cursor()
+        for index in indexes:
+            cursor.execute(str(CreateIndex(index).compile(dialect=engine.dialect)))
+        cursor.close()
+        raw.commit()
+        log(f"post indexes in {time.perf_counter() - started:.1f}s")
+
+        # Votes: distinct voters per post, the vote_count trigger is off as counts are already written
+        started = time.perf_counter()
+        population = range(len(user_ids))
+
+        def vote_rows():
+            for index, count in enumerate(vote_counts):
+                post_id = first_post + index
+                for offset in rng.sample(population, count):
+                    yield (post_id, first_user + offset)
+
+        skipped = _skip_triggers(raw)  # Also skips the vote_count trigger
+        cursor = raw.cursor()
+        if not skipped:
+            cursor.execute("ALTER TABLE votes DISABLE TRIGGER USER")  # Table owners may still turn off the vote_count trigger
+        cursor.close()
+        created_votes = _copy(raw, "votes", ("post_id", "user_id"), vote_rows(), chunk_rows)
+        cursor = raw.cursor()
+        if not skipped:
+            cursor.execute("ALTER TABLE votes ENABLE TRIGGER USER")
+        cursor.close()
+        raw.commit()
+
+        # Fresh statistics so the planner sees the new row counts right away
+        raw.autocommit = True
+        cursor = raw.cursor()
+        cursor.execute("ANALYZE users; ANALYZE posts; ANALYZE votes")
+        cursor.close()
+        log(f"votes: {created_votes} in {time.perf_counter() - started:.1f}s")
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+    return {"users": users, "posts": posts, "votes": created_votes}
+
+def main(argv=None) -> int:
+    from .database import engine
+
+    parser = argparse.ArgumentParser(prog="python -m app.datagen", description="Bulk load a deterministic synthetic dataset.")
+    parser.add_argument("--users", type=int, default=10_000, help="Users to create.")
+    parser.add_argument("--posts", type=int, default=100_000, help="Posts to create.")
+    parser.add_argument("--votes", type=int, default=1_000_000, help="Approximate votes to create.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed, the same seed gives the same data.")
+    parser.add_argument("--user-skew", type=float, default=1.0, help="Zipf exponent of posts per user.")
+    parser.add_argument("--vote-skew", type=float, default=1.1, help="Zipf exponent of votes per post.")
+    parser.add_argument("--days", type=int, default=365, help="Days the posts are spread over.")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Password of every generated user.")
+    parser.add_argument("--chunk-rows", type=int, default=100_000, help="Rows per COPY round trip.")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate every table first (destroys all data).")
+    args = parser.parse_args(argv)
+
+    if args.reset:
+        models.Base.metadata.drop_all(bind=engine)
+        models.Base.metadata.create_all(bind=engine)
+
+    started = time.perf_counter()
+    generate(
+        engine, args.users, args.posts, args.votes, seed=args.seed, user_skew=args.user_skew,
+        vote_skew=args.vote_skew, days=args.days, password=args.password, chunk_rows=args.chunk_rows,
+    )
+    print(f"done in {time.perf_counter() - started:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+from typing import AsyncIterator, Iterator
+
+import pydantic_core
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+# ---------------------------------------------------
+# Streaming NDJSON Export over Server-Side Cursors
+# Used by GET /posts/export
+# ---------------------------------------------------
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def _ndjson(rows) -> bytes:
+    """
+    Encodes a partition of rows as NDJSON, one object per row.
+    """
+    return b"".join(pydantic_core.to_json(row._asdict()) + b"\n" for row in rows)
+
+def _stream_sync(session_factory, query: Select, chunk_rows: int) -> Iterator[bytes]:
+    # StreamingResponse iterates a sync generator in the threadpool
+    with session_factory() as db:
+        result = db.execute(query.execution_options(yield_per=chunk_rows))
+        for rows in result.partitions():
+            yield _ndjson(rows)
+
+async def _stream_async(session_factory, query: Select, chunk_rows: int) -> AsyncIterator[bytes]:
+    async with session_factory() as db:
+        result = await db.stream(query.execution_options(yield_per=chunk_rows))
+        async for rows in result.partitions():
+            yield _ndjson(rows)
+
+def stream_ndjson(session_factory, query: Select, chunk_rows: int):
+    """
+    Streams the rows of a Core query as NDJSON chunks from a session of its own.
+
+    `yield_per` makes the driver use a server-side cursor (`stream_results`), so only
+    `chunk_rows` rows are in memory at a time however large the result is. The
+    session is closed when the stream ends or the client disconnects.
+
+    Args:
+        session_factory: `SessionLocal` or `AsyncSessionLocal`, see `database.get_session_factory`.
+        query (Select): Query selecting labelled columns, each row becomes one JSON object.
+        chunk_rows (int): Rows fetched and written per chunk.
+
+    Returns:
+        An iterator (or async iterator) of NDJSON byte chunks for a `StreamingResponse`.
+    """
+    if isinstance(session_factory, async_sessionmaker):
+        return _stream_async(session_factory, query, chunk_rows)
+    return _stream_sync(session_factory, query, chunk_rows)
@@ -1,14 +1,41 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 
-from .routers import post, user, auth, vote # Import post and user routers
-from . import models
+from .routers import post, user, auth, vote, internal, metrics # Import post and user routers
+from . import startup, ultils
+from .vote_buffer import vote_buffer
+from .trending import trending_refresher
+from .replicas import ReadYourWritesMiddleware, replica_set
+from .metrics import MetricsMiddleware, request_metrics
+from .query_stats import QueryStatsMiddleware
 from .database import engine # import the engine from the database.py
 from .config import settings
 from fastapi.middleware.cors import CORSMiddleware
 
-models.Base.metadata.create_all(bind=engine) # Create the tables in the database automatically can be remove if have alembic
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application startup and shutdown hook.
+    """
+    # Once per worker, not at import: importing the app never needs the database
+    await run_in_threadpool(startup.prepare_schema, engine, settings.startup_schema_mode)
+    if settings.vote_write_behind:
+        vote_buffer.start()
+    await run_in_threadpool(replica_set.start) # First health check connects to every replica, off the event loop
+    if settings.trending_enabled:
+        trending_refresher.start()
+    startup.booted()
+    yield
+    trending_refresher.stop()
+    replica_set.stop()
+    if settings.vote_write_behind:
+        vote_buffer.stop() # Drain buffered votes before the worker exits
+    ultils.shutdown_executor() # Let running bcrypt calls finish
+
 # Create a FastAPI Instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 origins = ["*"] # Setting for everyone
 
@@ -21,14 +48,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Sends a client's reads to the primary right after it wrote, see settings.read_your_writes_seconds
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Statement count and DB time of each request, in the Server-Timing header
+if settings.sql_stats_enabled:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Added last so it wraps every other middleware and times the whole request
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
 # Including routers
 app.include_router(post.router)
 app.include_router(user.router)
 app.include_router(auth.router)
 app.include_router(vote.router)
+if settings.internal_endpoints_enabled:
+    app.include_router(internal.router)
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
 
 @app.get("/")
 def root():
     return {"message": "Welcome to my API!"}
 
-
+startup.imported()
@@ -0,0 +1,92 @@
+import argparse
+import sys
+from typing import List, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+# ---------------------------------------------------
+# Maintenance Commands
+# Usage: python -m app.maintenance vote-counts [--repair]
+# ---------------------------------------------------
+
+def _actual_vote_counts():
+    """
+    Builds a subquery with the real number of votes of every post.
+    """
+    return (
+        select(models.Post.id.label("post_id"), func.count(models.Vote.post_id).label("actual"))
+        .join(models.Vote, models.Vote.post_id == models.Post.id, isouter=True)
+        .group_by(models.Post.id)
+        .subquery()
+    )
+
+def find_vote_count_drift(db: Session) -> List[Tuple[int, int, int]]:
+    """
+    Lists the posts whose denormalized `vote_count` differs from the votes table.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+
+    Returns:
+        List[Tuple[int, int, int]]: `(post_id, stored, actual)` for every drifted post.
+    """
+    actual = _actual_vote_counts()
+    rows = db.execute(
+        select(models.Post.id, models.Post.vote_count, actual.c.actual)
+        .join(actual, actual.c.post_id == models.Post.id)
+        .where(models.Post.vote_count != actual.c.actual)
+        .order_by(models.Post.id)
+    )
+    return [tuple(row) for row in rows]
+
+def repair_vote_counts(db: Session) -> int:
+    """
+    Rewrites `vote_count` for every drifted post from the votes table.
+
+    Args:
+        db (Session): SQLAlchemy database session, committed on success.
+
+    Returns:
+        int: Number of posts that were repaired.
+    """
+    actual = _actual_vote_counts()
+    result = db.execute(
+        update(models.Post)
+        .where(models.Post.id == actual.c.post_id, models.Post.vote_count != actual.c.actual)
+        .values(vote_count=actual.c.actual)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.maintenance", description="Database maintenance commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    vote_counts = commands.add_parser("vote-counts", help="Check posts.vote_count against the votes table.")
+    vote_counts.add_argument("--repair", action="store_true", help="Rewrite drifted counters.")
+
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        drift = find_vote_count_drift(db)
+        for post_id, stored, actual in drift:
+            print(f"post {post_id}: vote_count={stored} actual={actual}")
+
+        if not drift:
+            print("vote counts are consistent")
+            return 0
+        if args.repair:
+            print(f"repaired {repair_vote_counts(db)} post(s)")
+            return 0
+        return 1  # Non-zero so cron jobs and CI can alert on drift
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
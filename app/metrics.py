@@ -0,0 +1,260 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Sequence
+
+# ---------------------------------------------------
+# In-Process Measurement Primitives
+# ---------------------------------------------------
+
+# Upper bounds (in seconds) of the latency buckets, from 1ms to 10s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class LatencyHistogram:
+    """
+    Thread-safe cumulative latency histogram.
+
+    Attributes:
+        buckets (tuple): Upper bounds of the buckets in seconds.
+        count (int): Number of observations.
+        sum (float): Total of all observations in seconds.
+        max (float): Largest observation in seconds.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        """
+        Records one observation.
+
+        Args:
+            seconds (float): Measured duration in seconds.
+        """
+        index = 0
+        for bound in self.buckets:
+            if seconds <= bound:
+                break
+            index += 1
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self) -> dict:
+        """
+        Returns a consistent copy of the histogram for reporting.
+
+        Returns:
+            dict: count, sum, mean and max in seconds plus the cumulative bucket counts.
+        """
+        with self._lock:
+            counts = list(self.bucket_counts)
+            count, total, largest = self.count, self.sum, self.max
+
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "max": largest,
+            "buckets": cumulative,
+        }
+
+# ---------------------------------------------------
+# Per-Route HTTP Request Metrics (Prometheus text format)
+# ---------------------------------------------------
+
+# Route label of requests that matched no route, so unknown paths can't grow the label set
+UNMATCHED_ROUTE = "unmatched"
+
+class _Shard:
+    """
+    Counters written by a single thread, so updates need no lock.
+    """
+    __slots__ = ("in_flight", "durations", "responses")
+
+    def __init__(self):
+        self.in_flight = 0
+        self.durations = {}  # (method, route) -> bucket counts, +Inf count, then the sum of seconds
+        self.responses = {}  # (method, route, status) -> count
+
+class RequestMetrics:
+    """
+    Latency histograms, response counters and an in-flight gauge per route template.
+
+    Every thread records into its own shard, so the request path takes no lock and
+    only builds the lookup keys once a route has been seen. Shards are merged when
+    the metrics are read, which tolerates counts that are a few requests stale.
+
+    Attributes:
+        buckets (tuple): Upper bounds of the latency buckets in seconds.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()  # Only taken when a thread records its first request
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def started(self) -> _Shard:
+        """
+        Counts a request as in flight.
+
+        Returns:
+            The shard to pass to `finished`, requests must finish on the shard they started on.
+        """
+        shard = self._shard()
+        shard.in_flight += 1
+        return shard
+
+    def finished(self, shard: _Shard, method: str, route: str, status: int, seconds: float):
+        """
+        Records a completed request.
+
+        Args:
+            shard: The shard returned by `started`.
+            method (str): HTTP method.
+            route (str): Route template such as `/posts/{post_id}`, never the raw path.
+            status (int): Response status code.
+            seconds (float): Time from the start of the request to the end of the response.
+        """
+        shard.in_flight -= 1
+        key = (method, route)
+        durations = shard.durations.get(key)
+        if durations is None:
+            durations = shard.durations[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        durations[bisect_left(self.buckets, seconds)] += 1
+        durations[-1] += seconds
+        key = (method, route, status)
+        shard.responses[key] = shard.responses.get(key, 0) + 1
+
+    def collect(self) -> dict:
+        """
+        Merges every shard.
+
+        Returns:
+            dict: `in_flight`, `durations` ((method, route) -> bucket counts + sum) and
+            `responses` ((method, route, status) -> count).
+        """
+        with self._shards_lock:
+            shards = list(self._shards)
+        in_flight, durations, responses = 0, {}, {}
+        for shard in shards:
+            in_flight += shard.in_flight
+            for key, values in list(shard.durations.items()):
+                merged = durations.setdefault(key, [0] * len(values))
+                for index, value in enumerate(list(values)):
+                    merged[index] += value
+            for key, count in list(shard.responses.items()):
+                responses[key] = responses.get(key, 0) + count
+        return {"in_flight": in_flight, "durations": durations, "responses": responses}
+
+    def reset(self):
+        """
+        Forgets every recorded request (counts of requests in flight are kept).
+        """
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.durations = {}
+                shard.responses = {}
+
+    def render_prometheus(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        metrics = self.collect()
+        lines = [
+            "# HELP http_requests_in_flight Requests being served right now.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {metrics['in_flight']}",
+            "# HELP http_request_duration_seconds Time to serve a request, by route template.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), values in sorted(metrics["durations"].items()):
+            labels = f'method="{_escape(method)}",route="{_escape(route)}"'
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                running += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{le}"}} {running}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {values[-1]}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {running}")
+        lines += [
+            "# HELP http_responses_total Responses sent, by route template and status code.",
+            "# TYPE http_responses_total counter",
+        ]
+        for (method, route, status), count in sorted(metrics["responses"].items()):
+            lines.append(f'http_responses_total{{method="{_escape(method)}",route="{_escape(route)}",status="{status}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    # Label values escape backslashes, quotes and newlines
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that feeds `RequestMetrics`.
+
+    The route template is read from `scope["route"]`, which the router sets when
+    it matches, so `/posts/1` and `/posts/2` share the `/posts/{post_id}` series.
+    A request is timed until the last byte of its body is sent.
+    """
+
+    def __init__(self, app, metrics: "RequestMetrics"):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        shard = self.metrics.started()
+        status = 500  # Reported when the app raises before it responds
+        recorded = False
+
+        def record():
+            nonlocal recorded
+            recorded = True
+            route = scope.get("route")
+            self.metrics.finished(
+                shard, scope["method"], getattr(route, "path", UNMATCHED_ROUTE), status, time.perf_counter() - started
+            )
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not recorded:
+                record()  # Raised, or the client went away mid-body
+
+# Shared request metrics, served on /metrics
+request_metrics = RequestMetrics()
@@ -1,7 +1,7 @@
 import uuid
-from sqlalchemy import TIMESTAMP, Boolean, Column, ForeignKey, String, Integer, text
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import DDL, TIMESTAMP, Boolean, Column, Computed, Float, ForeignKey, Index, String, Integer, event, func, text
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from .database import Base
 
 class Post(Base):
@@ -11,8 +11,21 @@ class Post(Base):
     content = Column(String, nullable=False)
     published = Column(Boolean, server_default='TRUE', nullable=False) # Default to True
     created_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'), onupdate=func.now(), nullable=False) # Part of the post ETag
     owner_id = Column(Integer, ForeignKey("users.id", ondelete='CASCADE'), nullable = False ) # Add ForeignKey
+    vote_count = Column(Integer, server_default=text('0'), nullable=False) # Maintained by the votes_vote_count_sync trigger
     owner = relationship("User") # Fetch additional information from User sqlalchemy using owner_id, don't need to delete database
+    # Full-text search document over title and content, generated by Postgres and never loaded by default
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, ''))", persisted=True),
+    ))
+
+    __table_args__ = (
+        Index("ix_posts_created_at_id", created_at.desc(), id.desc()), # Keyset pagination order for GET /posts
+        Index("ix_posts_owner_id_created_at_id", owner_id, created_at.desc(), id.desc()), # Per-author feed, GET /users/{user_id}/posts
+        Index("ix_posts_search_vector", search_vector, postgresql_using="gin"), # Full-text search for GET /posts
+    )
 
 class User(Base):
     __tablename__ = "users"
@@ -25,3 +38,42 @@ class Vote(Base):
     __tablename__ = "votes"
     post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key = True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key = True)
+
+class PostTrending(Base):
+    """
+    Materialized trending ranking of recent posts, rebuilt incrementally by app.trending.
+    """
+    __tablename__ = "post_trending"
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key = True)
+    score = Column(Float, nullable=False) # Time-decayed vote score, see app.trending
+    vote_count = Column(Integer, nullable=False) # posts.vote_count the score was computed from
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False) # Copy of posts.created_at, rows leave the window by it
+    post = relationship("Post")
+
+    __table_args__ = (
+        Index("ix_post_trending_score", score.desc(), post_id.desc()), # Top-N lookup of GET /posts/trending
+    )
+
+# Keep posts.vote_count exact on every insert or delete in votes, including cascades.
+# Mirrors the trigger created by the "add posts vote count" migration so create_all matches it.
+VOTE_COUNT_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION posts_vote_count_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET vote_count = vote_count + 1 WHERE id = NEW.post_id;
+    ELSE
+        UPDATE posts SET vote_count = vote_count - 1 WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+VOTE_COUNT_TRIGGER = DDL("""
+CREATE TRIGGER votes_vote_count_sync
+AFTER INSERT OR DELETE ON votes
+FOR EACH ROW EXECUTE FUNCTION posts_vote_count_sync()
+""")
+
+event.listen(Vote.__table__, "after_create", VOTE_COUNT_FUNCTION.execute_if(dialect="postgresql"))
+event.listen(Vote.__table__, "after_create", VOTE_COUNT_TRIGGER.execute_if(dialect="postgresql"))
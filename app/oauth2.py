@@ -1,10 +1,14 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt  # JSON Web Token implementation
+import hashlib
+import time
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import schemas, database, models
+from .cache import ExpiringSet, TTLCache
 from .config import settings
 
 # ---------------------------------------------------
@@ -19,6 +23,53 @@ SECRETE_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
+# Detached users by ID, saves the user lookup on every authenticated request
+user_cache = TTLCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl_seconds)
+
+def invalidate_user(user_id: int):
+    """
+    Drops a user from the cache so the next request reloads it.
+
+    Called automatically when a `models.User` is updated or deleted through the ORM.
+    Bulk `update()`/`delete()` statements bypass those events and must call it explicitly.
+
+    Args:
+        user_id (int): ID of the changed user.
+    """
+    user_cache.invalidate(user_id)
+
+# Verified token payloads by token digest, each entry lives until the token's `exp`
+token_cache = TTLCache(maxsize=settings.token_cache_size, ttl=0)
+# Digests of revoked tokens, kept until the token would have expired anyway.
+# In-process only: with several workers a revocation holds on the worker that received it.
+revoked_tokens = ExpiringSet()
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def revoke_access_token(token: str):
+    """
+    Rejects a token from now on, even though its signature and expiry are still valid.
+
+    Args:
+        token (str): The JWT token string to revoke.
+    """
+    try:
+        expires_at = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return  # Not a token we would ever accept
+
+    digest = _token_digest(token)
+    ttl = expires_at - time.time() if expires_at else int(ACCESS_TOKEN_EXPIRE_MINUTES) * 60
+    if ttl > 0:
+        revoked_tokens.add(digest, ttl)
+    token_cache.invalidate(digest)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.id)
+
 def create_access_token(data: dict):
     """
     Generates a new JWT access token.
@@ -40,6 +91,9 @@ def verify_access_token(token: str, credentials_exception):
     """
     Decodes and validates a JWT access token.
 
+    Tokens that already passed verification are served from `token_cache`
+    until their `exp`, skipping the signature check.
+
     Args:
         token (str): The JWT token string.
         credentials_exception (HTTPException): Exception to raise if validation fails.
@@ -47,6 +101,14 @@ def verify_access_token(token: str, credentials_exception):
     Returns:
         TokenData: A Pydantic schema containing the user ID from token.
     """
+    digest = _token_digest(token)
+    if digest in revoked_tokens:
+        raise credentials_exception
+
+    token_data = token_cache.get(digest)
+    if token_data is not None:
+        return token_data
+
     try:
         payload = jwt.decode(token, SECRETE_KEY, algorithms=[ALGORITHM])
         id = payload.get("user_id")
@@ -54,24 +116,33 @@ def verify_access_token(token: str, credentials_exception):
         if id is None:
             raise credentials_exception
 
-        return schemas.TokenData(id=str(id))
+        token_data = schemas.TokenData(id=str(id))
+        expires_at = payload.get("exp")
+        if expires_at is not None and expires_at > time.time():
+            token_cache.set(digest, token_data, ttl=expires_at - time.time())
+        return token_data
 
     except JWTError:
         raise credentials_exception
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_read_session),
+    primary: AsyncSession = Depends(database.get_session)
 ):
     """
     Dependency to get the current user based on the JWT token.
 
     Args:
         token (str): Bearer token extracted from the request.
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async session (or its sync adapter), possibly on a read replica.
+        primary (AsyncSession): Session on the primary, only queried when the replica misses the user.
 
     Returns:
         models.User: The user associated with the token.
+
+    Raises:
+        HTTPException: 401 if the token is invalid or its user no longer exists.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -80,5 +151,22 @@ def get_current_user(
     )
 
     token_data = verify_access_token(token, credentials_exception)
-    user = db.query(models.User).filter(models.User.id == token_data.id).first()
+    user_id = int(token_data.id)
+
+    if settings.user_cache_enabled:
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+
+    user = await db.get(models.User, user_id)
+    if user is None:
+        # A user who just signed up may not have reached the replica yet, the primary decides
+        db = primary
+        user = await db.get(models.User, user_id)
+    if user is None:
+        raise credentials_exception
+
+    if settings.user_cache_enabled:
+        db.expunge(user) # Detach so the cached copy outlives this session
+        user_cache.set(user_id, user)
     return user
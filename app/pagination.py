@@ -0,0 +1,51 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Tuple
+
+from fastapi import HTTPException, status
+
+# ---------------------------------------------------
+# Keyset (Cursor) Pagination Helpers
+# ---------------------------------------------------
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """
+    Encodes the position of the last row of a page into an opaque cursor.
+
+    Args:
+        created_at (datetime): Creation timestamp of the last row.
+        id (int): ID of the last row, used as a tie breaker.
+
+    Returns:
+        str: URL-safe cursor string to pass back as `cursor`.
+    """
+    raw = json.dumps([created_at.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The opaque cursor sent by the client.
+
+    Returns:
+        Tuple[datetime, int]: The `(created_at, id)` position of the cursor.
+
+    Raises:
+        HTTPException: 400 Bad Request if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
@@ -0,0 +1,111 @@
+import time
+from typing import Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from .config import settings
+from .metrics import LatencyHistogram
+
+# ---------------------------------------------------
+# Connection Pool Configuration and Statistics
+# ---------------------------------------------------
+
+class _WaitTimingMixin:
+    """
+    Measures how long each checkout waits for a pooled connection.
+
+    Attributes:
+        wait_time (LatencyHistogram): Time spent acquiring connections.
+        timeouts (int): Checkouts that gave up after `pool_timeout`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_time = LatencyHistogram()
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_time.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool, keep the statistics
+        pool = super().recreate()
+        pool.wait_time, pool.timeouts = self.wait_time, self.timeouts
+        return pool
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    """
+    `QueuePool` that records checkout wait times.
+    """
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    """
+    `AsyncAdaptedQueuePool` that records checkout wait times.
+    """
+
+def engine_options(is_async: bool = False) -> dict:
+    """
+    Builds the pool keyword arguments for `create_engine` from the settings.
+
+    Args:
+        is_async (bool): True when building options for the asyncpg engine.
+
+    Returns:
+        dict: Keyword arguments for `create_engine` or `create_async_engine`.
+    """
+    if settings.database_pool_mode == "null":
+        # PgBouncer transaction mode: PgBouncer owns pooling, open a connection per checkout
+        options = {"poolclass": NullPool}
+        if is_async:
+            # Server-side prepared statements don't survive PgBouncer switching backends
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        return options
+
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+        "pool_use_lifo": settings.database_pool_use_lifo,
+    }
+
+def pool_status(engine) -> Optional[dict]:
+    """
+    Reports the live state of an engine's connection pool.
+
+    Args:
+        engine: A SQLAlchemy `Engine` or `AsyncEngine`, or None.
+
+    Returns:
+        dict: Checked out, idle and overflow connections and checkout wait times,
+        or None when no engine is given.
+    """
+    if engine is None:
+        return None
+
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"mode": "null"}
+
+    status = {
+        "mode": "queue",
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),  # Negative while the pool is still filling up
+        "max_overflow": pool._max_overflow,
+    }
+    if isinstance(pool, _WaitTimingMixin):
+        status["timeouts"] = pool.timeouts
+        status["wait_seconds"] = pool.wait_time.snapshot()
+    return status
@@ -0,0 +1,156 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------
+# Per-Request SQL Statistics
+# Statement count, DB time and rows of each request, reported in the
+# Server-Timing header and one structured log line per request
+# ---------------------------------------------------
+
+class RepeatedStatementError(RuntimeError):
+    """
+    Raised in `sql_repeat_mode="raise"` when a request runs the same statement
+    more than `sql_repeat_threshold` times, the usual sign of an N+1 query.
+    """
+
+class QueryStats:
+    """
+    SQL statistics of one unit of work (usually a request).
+
+    Attributes:
+        statements (int): Statements executed.
+        seconds (float): Time spent executing them, as seen by the driver.
+        rows (int): Rows reported by the cursors (returned or affected).
+        repeats (dict): Execution count per statement text.
+    """
+
+    __slots__ = ("statements", "seconds", "rows", "repeats", "threshold", "mode")
+
+    def __init__(self, threshold: int, mode: str):
+        self.statements = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.repeats = {}
+        self.threshold = threshold
+        self.mode = mode
+
+    def count(self, statement: str):
+        """
+        Counts one statement and checks it against the repeat threshold.
+        """
+        self.statements += 1
+        if self.mode == "off":
+            return
+        repeats = self.repeats.get(statement, 0) + 1
+        self.repeats[statement] = repeats
+        if repeats == self.threshold + 1:
+            message = f"Statement ran more than {self.threshold} times in one request (N+1?): {statement[:200]}"
+            if self.mode == "raise":
+                raise RepeatedStatementError(message)
+            logger.warning(message)
+
+    def server_timing(self) -> str:
+        """
+        Returns the `Server-Timing` header value for these statistics.
+        """
+        return f'db;dur={self.seconds * 1000:.3f};desc="queries={self.statements} rows={self.rows}"'
+
+# Statistics of the request being served, None outside of requests
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_stats", default=None)
+
+@contextmanager
+def capture(threshold: Optional[int] = None, mode: Optional[str] = None):
+    """
+    Collects the SQL statistics of every statement run inside the block, on any
+    engine, including in threads started with `run_in_threadpool` and in async sessions.
+
+    Args:
+        threshold (Optional[int]): Repeats allowed per statement, `settings.sql_repeat_threshold` by default.
+        mode (Optional[str]): "off", "warn" or "raise", `settings.sql_repeat_mode` by default.
+
+    Yields:
+        QueryStats: Filled in as statements run.
+    """
+    stats = QueryStats(
+        settings.sql_repeat_threshold if threshold is None else threshold,
+        settings.sql_repeat_mode if mode is None else mode,
+    )
+    token = current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_stats.reset(token)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats.get()
+    if stats is not None:
+        stats.count(statement)
+        context._stats_started = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats.get()
+    started = getattr(context, "_stats_started", None)
+    if stats is not None and started is not None:
+        stats.seconds += time.perf_counter() - started
+        stats.rows += max(cursor.rowcount, 0)  # -1 when unknown, e.g. server-side cursors
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware that collects the SQL statistics of each request, adds them
+    to the response as a `Server-Timing` header and logs them as one JSON line
+    on the `app.query_stats` logger (INFO).
+
+    Statements a streaming body runs after the headers were sent are logged but
+    cannot be in the header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500  # Logged when the app raises before it responds
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total = f"app;dur={(time.perf_counter() - started) * 1000:.3f}"
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", f"{stats.server_timing()}, {total}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        with capture() as stats:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if logger.isEnabledFor(logging.INFO):
+                    route = scope.get("route")
+                    logger.info(json.dumps({
+                        "event": "request_sql",
+                        "method": scope["method"],
+                        "route": getattr(route, "path", None),
+                        "status": status,
+                        "statements": stats.statements,
+                        "db_ms": round(stats.seconds * 1000, 3),
+                        "rows": stats.rows,
+                        "total_ms": round((time.perf_counter() - started) * 1000, 3),
+                    }))
@@ -0,0 +1,236 @@
+import hashlib
+import ipaddress
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+
+from . import schemas
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------
+# Token Bucket Rate Limiting for Login and Signup
+# Every attempt costs a bcrypt call, throttled attempts get a 429 before any
+# hashing or DB access
+# ---------------------------------------------------
+
+# One bucket to take a token from: (key, capacity, tokens earned back per second)
+Limit = Tuple[str, int, float]
+
+class LocalBackend:
+    """
+    Token buckets kept in process memory, per worker.
+
+    Buckets are refilled lazily when they are used. At most `max_keys` are kept,
+    the least recently used one is dropped first (it then starts out full again).
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    async def take(self, limits: List[Limit]) -> float:
+        """
+        Takes one token from every bucket, or from none of them.
+
+        Returns:
+            float: 0 when the tokens were taken, otherwise the seconds until all buckets have one.
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels, wait = [], 0.0
+            for key, capacity, rate in limits:
+                tokens, updated_at = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - updated_at) * rate)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / rate)
+                levels.append(tokens)
+            if wait:
+                return wait
+            for (key, _, _), tokens in zip(limits, levels):
+                self._buckets[key] = (tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0.0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._buckets)
+
+    def clear(self):
+        """
+        Refills every bucket.
+        """
+        with self._lock:
+            self._buckets.clear()
+
+# Same algorithm as LocalBackend.take, atomic on the Redis server and timed by its clock
+_TAKE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local levels, wait = {}, 0
+for i, key in ipairs(KEYS) do
+    local capacity, rate = tonumber(ARGV[i * 2 - 1]), tonumber(ARGV[i * 2])
+    local bucket = redis.call('HMGET', key, 'tokens', 'updated_at')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated_at) * rate)
+    if tokens < 1 then wait = math.max(wait, (1 - tokens) / rate) end
+    levels[i] = tokens
+end
+if wait > 0 then return tostring(wait) end
+for i, key in ipairs(KEYS) do
+    local capacity, rate = tonumber(ARGV[i * 2 - 1]), tonumber(ARGV[i * 2])
+    redis.call('HSET', key, 'tokens', levels[i] - 1, 'updated_at', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))  -- Full again by then
+end
+return '0'
+"""
+
+class RedisBackend:
+    """
+    Token buckets shared by every worker through Redis, one round trip per attempt.
+
+    When Redis cannot be reached the attempt is allowed (fail open) and a warning logged:
+    the limiter protects the CPU, it must not take logins down with it.
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio  # Optional dependency, only needed with settings.rate_limit_redis_url
+
+        self.client = redis.asyncio.Redis.from_url(url)
+        self._take = self.client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, limits: List[Limit]) -> float:
+        args = []
+        for _, capacity, rate in limits:
+            args += [capacity, rate]
+        try:
+            return float(await self._take(keys=[key for key, _, _ in limits], args=args))
+        except Exception as exc:
+            logger.warning("Rate limit backend unavailable, allowing the attempt: %s", exc)
+            return 0.0
+
+    def __len__(self) -> int:
+        return 0  # Not tracked locally
+
+    def clear(self):
+        pass
+
+class RateLimiter:
+    """
+    Throttles attempts per client IP and per account (username or email).
+
+    Attributes:
+        backend: `LocalBackend` or `RedisBackend` holding the buckets.
+        rejected (int): Attempts this worker answered with a 429.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.rejected = 0
+
+    def limits(self, action: str, ip: str, account: Optional[str]) -> List[Limit]:
+        """
+        Returns the buckets an attempt is charged to.
+
+        Accounts are keyed by a digest of the lowercased name, so the shared backend
+        never stores email addresses.
+        """
+        limits = [(f"ratelimit:{action}:ip:{ip}", settings.rate_limit_ip_burst, settings.rate_limit_ip_per_second)]
+        if account:
+            digest = hashlib.sha256(account.strip().lower().encode()).hexdigest()
+            limits.append((f"ratelimit:{action}:account:{digest}", settings.rate_limit_account_burst, settings.rate_limit_account_per_second))
+        return limits
+
+    async def check(self, action: str, ip: str, account: Optional[str] = None):
+        """
+        Charges one attempt.
+
+        Raises:
+            HTTPException: 429 with a `Retry-After` header when a bucket is empty.
+        """
+        if not settings.rate_limit_enabled:
+            return
+        wait = await self.backend.take(self.limits(action, ip, account))
+        if wait:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, try again later",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    def stats(self) -> dict:
+        """
+        Returns the backend in use, its bucket count and the rejected attempts.
+        """
+        return {
+            "backend": type(self.backend).__name__,
+            "buckets": len(self.backend),
+            "rejected": self.rejected,
+        }
+
+    def clear(self):
+        """
+        Refills every local bucket and resets the counter.
+        """
+        self.backend.clear()
+        self.rejected = 0
+
+# Shared limiter, in process unless settings.rate_limit_redis_url is set
+limiter = RateLimiter(
+    RedisBackend(settings.rate_limit_redis_url) if settings.rate_limit_redis_url
+    else LocalBackend(settings.rate_limit_max_keys)
+)
+
+@lru_cache(maxsize=8)
+def _networks(proxies: tuple) -> tuple:
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+def _is_trusted(address: str, networks: tuple) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+def _client_ip(request: Request) -> str:
+    """
+    Returns the address the IP bucket is keyed on.
+
+    For requests forwarded by one of `settings.rate_limit_trusted_proxies`, this is
+    the rightmost `X-Forwarded-For` entry not added by a trusted proxy: everything to
+    its left is sent by the client and could be forged. Otherwise it is the peer.
+    """
+    peer = request.client.host if request.client else "unknown"
+    networks = _networks(tuple(settings.rate_limit_trusted_proxies))
+    if not networks or not _is_trusted(peer, networks):
+        return peer
+    hops = [hop.strip() for header in request.headers.getlist("x-forwarded-for") for hop in header.split(",")]
+    for hop in reversed(hops):
+        if hop and not _is_trusted(hop, networks):
+            return hop
+    return peer
+
+async def limit_login(request: Request, user_credentials: OAuth2PasswordRequestForm = Depends()):
+    """
+    Route dependency of `POST /login`, runs before the user lookup and bcrypt verification.
+    """
+    await limiter.check("login", _client_ip(request), user_credentials.username)
+
+async def limit_signup(request: Request, user: schemas.UserCreate):
+    """
+    Route dependency of `POST /users/`, runs before bcrypt hashing and the insert.
+    """
+    await limiter.check("signup", _client_ip(request), user.email)
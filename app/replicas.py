@@ -0,0 +1,197 @@
+import hashlib
+import itertools
+import logging
+import threading
+from typing import List, Optional
+
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from .cache import ExpiringSet
+from .config import settings
+from .pool import engine_options, pool_status
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------
+# Read Replica Routing
+# Enabled by listing URLs in settings.database_replica_urls
+# ---------------------------------------------------
+
+# Request header that sends a read to the primary, e.g. right after the client wrote
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+
+# Methods that never write, every other successful request marks its client as a recent writer
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+class Replica:
+    """
+    One read replica: a serving engine and a separate probe used by the health check.
+
+    Attributes:
+        name (str): The URL without its password, for logs and diagnostics.
+        healthy (bool): Result of the last health check, replicas start out healthy.
+        last_error (Optional[str]): Why the last health check failed.
+    """
+
+    def __init__(self, url: str, is_async: bool):
+        url = make_url(url)
+        self.name = url.render_as_string(hide_password=True)
+        if is_async:
+            self.engine = create_async_engine(url.set(drivername="postgresql+asyncpg"), **engine_options(is_async=True))
+            self.session_factory = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+        else:
+            self.engine = create_engine(url, **engine_options())
+            self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # The probe never borrows from the serving pool, so a full pool does not look like an outage
+        self.probe = create_engine(url.set(drivername="postgresql"), poolclass=NullPool, connect_args={"connect_timeout": 2})
+        self.healthy = True
+        self.last_error = None
+
+    def check(self) -> bool:
+        """
+        Runs `SELECT 1` on a fresh connection and records the outcome.
+        """
+        try:
+            with self.probe.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except Exception as exc:
+            if self.healthy:
+                logger.warning("Read replica %s is down, reads fall back to the primary: %s", self.name, exc)
+            self.healthy, self.last_error = False, str(exc).splitlines()[0]
+            return False
+        if not self.healthy:
+            logger.info("Read replica %s is back", self.name)
+        self.healthy, self.last_error = True, None
+        return True
+
+class ReplicaSet:
+    """
+    Load balances reads round-robin over the healthy replicas.
+
+    A background thread checks every replica each `check_interval` seconds.
+    When none is healthy, `pick` returns None and callers use the primary.
+    """
+
+    def __init__(self, urls: List[str], is_async: bool, check_interval: float):
+        self.replicas = [Replica(url, is_async) for url in urls]
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def pick(self) -> Optional[Replica]:
+        """
+        Returns the next healthy replica, or None to read from the primary.
+        """
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def check(self):
+        """
+        Health checks every replica once.
+        """
+        for replica in self.replicas:
+            replica.check()
+
+    def _run(self):
+        while not self._stopping.wait(self.check_interval):
+            self.check()
+
+    def start(self):
+        """
+        Checks the replicas, then keeps checking them in a background thread.
+        """
+        if not self.replicas or self._thread is not None:
+            return
+        self.check()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health-check", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the health check thread. Called on application shutdown.
+        """
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> List[dict]:
+        """
+        Returns the health and pool state of every replica.
+        """
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "last_error": replica.last_error,
+                "pool": pool_status(replica.engine),
+            }
+            for replica in self.replicas
+        ]
+
+# Shared replica set, empty unless settings.database_replica_urls is set
+replica_set = ReplicaSet(
+    settings.database_replica_urls,
+    is_async=settings.database_async,
+    check_interval=settings.database_replica_check_interval_seconds,
+)
+
+# Clients (by Authorization header digest) that wrote within the read-your-writes window
+recent_writers = ExpiringSet()
+
+def _client_key(authorization: bytes) -> str:
+    return hashlib.sha256(authorization).hexdigest()
+
+def read_session_factory(request):
+    """
+    Chooses the replica session factory for a read-only request.
+
+    Returns:
+        The session factory of a healthy replica, or None when the request must
+        read from the primary: no replica is healthy, the request sets
+        `X-Read-Your-Writes`, or the same client wrote in the last
+        `settings.read_your_writes_seconds`.
+    """
+    if not replica_set.replicas:
+        return None
+    if request.headers.get(READ_YOUR_WRITES_HEADER, "").lower() in ("1", "true", "yes"):
+        return None
+    authorization = request.headers.get("authorization")
+    if authorization and _client_key(authorization.encode()) in recent_writers:
+        return None
+    replica = replica_set.pick()
+    return replica.session_factory if replica else None
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware that remembers which clients just wrote, so their next reads
+    go to the primary and see the write despite replication lag.
+
+    A client is identified by its Authorization header. The window is kept in
+    process memory: with several workers, send `X-Read-Your-Writes: 1` for reads
+    that must follow a write.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not replica_set.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        authorization = dict(scope["headers"]).get(b"authorization")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and authorization and message["status"] < 400:
+                recent_writers.add(_client_key(authorization), settings.read_your_writes_seconds)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
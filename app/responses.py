@@ -0,0 +1,29 @@
+from typing import Any, Optional
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+# ---------------------------------------------------
+# Fast JSON Responses
+# ---------------------------------------------------
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered straight to bytes by pydantic-core's Rust serializer.
+
+    Handlers that already built their Pydantic models (e.g. `PostOut.from_row`) return this directly,
+    which skips FastAPI's second `response_model` validation pass and the
+    `jsonable_encoder` + stdlib `json` encoding. Keep `response_model` on the
+    route for the OpenAPI schema.
+
+    Args:
+        include (Optional[dict]): Fields to serialize, same format as `model_dump(include=...)`.
+            Used for sparse fieldsets, since constructed models still hold defaults of unset fields.
+    """
+
+    def __init__(self, content: Any, *args, include: Optional[dict] = None, **kwargs):
+        self.include = include  # Read by render(), which runs inside JSONResponse.__init__
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content, include=self.include)
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
-from .. import schemas, models, ultils, oauth2
+from ..database import get_session
+from .. import schemas, models, ultils, oauth2, ratelimit
 
 # Define an API router with a "Authentication" tag for automatic Swagger grouping
 router = APIRouter(
@@ -11,10 +12,17 @@ router = APIRouter(
 )
 
 # Login endpoint
-@router.post("/login", response_model=schemas.Token, summary="Authenticate a user and return a JWT token", response_description="JWT access token with token type")
-def login(
+# Route dependencies run first: throttled attempts get a 429 before the lookup and bcrypt
+@router.post(
+    "/login",
+    response_model=schemas.Token,
+    dependencies=[Depends(ratelimit.limit_login)],
+    summary="Authenticate a user and return a JWT token",
+    response_description="JWT access token with token type"
+)
+async def login(
     user_credentials: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_session)
 ):
     """
     Authenticate a user using their email and password.
@@ -22,13 +30,14 @@ def login(
     - **username**: Email address (used as username field by OAuth2 spec)
     - **password**: User's password
     - **Returns**: JWT access token and token type if credentials are valid.
+    - **429**: Too many attempts from this IP or for this username, see `Retry-After`.
 
     This endpoint validates the user's credentials and returns an access token,
     which can be used to authorize requests to protected endpoints.
     """
     
     # Fetch the user from the database using email (OAuth2 uses "username" for form field)
-    user = db.query(models.User).filter(models.User.email == user_credentials.username).first()
+    user = await db.scalar(select(models.User).where(models.User.email == user_credentials.username))
     
     # Raise error if user not found
     if not user:
@@ -37,8 +46,8 @@ def login(
             detail="Invalid Credentials"
         )
     
-    # Verify the provided password against the stored hash
-    if not ultils.verify(user_credentials.password, user.password):
+    # Verify the provided password against the stored hash, on the bounded hashing executor (503 when saturated)
+    if not await ultils.verify_async(user_credentials.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid Credentials"
@@ -52,3 +61,17 @@ def login(
         "access_token": access_token,
         "token_type": "bearer"
     }
+
+# Logout endpoint
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT, summary="Revoke the current access token", response_description="Token revoked")
+async def logout(
+    token: str = Depends(oauth2.oauth2_scheme),
+    current_user: int = Depends(oauth2.get_current_user)
+):
+    """
+    Revoke the bearer token used for this request.
+
+    - **returns**: 204 No Content, the token is rejected from then on until it expires
+    """
+    oauth2.revoke_access_token(token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,114 @@
+from fastapi import APIRouter
+
+from .. import startup, ultils
+from ..database import engine, async_engine
+from ..oauth2 import token_cache, user_cache
+from ..pool import pool_status
+from ..ratelimit import limiter
+from ..replicas import replica_set
+from ..trending import trending_refresher
+from ..vote_buffer import vote_buffer
+
+# Diagnostics for operators, only mounted when settings.internal_endpoints_enabled is set
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"]
+)
+
+@router.get("/pool", summary="Connection pool statistics", response_description="Live pool counters per engine")
+def get_pool_stats():
+    """
+    Report the state of the database connection pools.
+
+    - **checked_out**: Connections currently lent to requests
+    - **idle**: Connections waiting in the pool
+    - **overflow**: Connections opened above `pool_size`
+    - **wait_seconds**: Histogram of the time requests waited for a connection
+    - **timeouts**: Checkouts that failed after `pool_timeout`
+    """
+    return {
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine),
+    }
+
+@router.get("/caches", summary="In-process cache statistics", response_description="Size and hit/miss counters per cache")
+def get_cache_stats():
+    """
+    Report the size and hit rate of the in-process caches.
+
+    - **tokens**: Verified JWTs in `verify_access_token`
+    - **users**: Authenticated user lookups in `get_current_user`
+    """
+    return {
+        "tokens": token_cache.stats(),
+        "users": user_cache.stats(),
+    }
+
+@router.get("/hashing", summary="Password hashing executor statistics", response_description="Admission counters and latencies of bcrypt calls")
+def get_hashing_stats():
+    """
+    Report the load on the bcrypt hashing executor.
+
+    - **pending**: Calls queued or running right now
+    - **rejected**: Calls refused with 503 because too many were pending
+    - **queue_timeouts**: Calls refused with 503 after waiting too long for a worker
+    - **queue_wait_seconds** / **latency_seconds**: Histograms of queue wait and total call time
+    """
+    return ultils.hashing_stats()
+
+@router.get("/vote-buffer", summary="Write-behind vote buffer statistics", response_description="Buffer depth and flush counters")
+def get_vote_buffer_stats():
+    """
+    Report the state of the write-behind vote buffer.
+
+    - **depth**: Votes accepted but not committed yet
+    - **flushed** / **failed_flushes**: Votes written and flushes that had to be retried
+    - **flush_latency_seconds**: Histogram of flush durations
+    """
+    return vote_buffer.stats()
+
+@router.get("/trending", summary="Trending ranking refresher statistics", response_description="Refresh counters and latencies")
+def get_trending_stats():
+    """
+    Report the state of the trending ranking refresher.
+
+    - **leader**: This worker holds the refresh lock, the others leave the refreshes to it
+    - **refreshes** / **failed_refreshes**: Refreshes done and refreshes that raised
+    - **rows_written**: Rows the last refresh wrote or removed
+    - **last_refresh**: When the ranking was last brought up to date
+    - **refresh_latency_seconds**: Histogram of refresh durations
+    """
+    return trending_refresher.stats()
+
+@router.get("/replicas", summary="Read replica health", response_description="Health and pool state per replica")
+def get_replica_stats():
+    """
+    Report the read replicas behind the read-only endpoints.
+
+    - **healthy**: Result of the last health check, unhealthy replicas get no reads
+    - **last_error**: Why the last health check failed
+    - **pool**: Pool counters of the replica engine, as in `/internal/pool`
+    """
+    return replica_set.stats()
+
+@router.get("/startup", summary="Worker startup timings", response_description="Import, schema and boot times of this worker")
+def get_startup_stats():
+    """
+    Report how long this worker took to start.
+
+    - **import_seconds**: Importing the application
+    - **schema_mode** / **schema_seconds**: `settings.startup_schema_mode` and the time it took
+    - **boot_seconds**: From the first import until the worker was ready to serve
+    """
+    return startup.timings
+
+@router.get("/ratelimit", summary="Login and signup rate limiter", response_description="Backend, bucket count and rejected attempts")
+def get_rate_limit_stats():
+    """
+    Report the state of the login and signup rate limiter.
+
+    - **backend**: `LocalBackend` (per worker) or `RedisBackend` (shared)
+    - **buckets**: Buckets held in process
+    - **rejected**: Attempts this worker answered with a 429
+    """
+    return limiter.stats()
@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..metrics import request_metrics
+
+# Prometheus scrape target, only mounted when settings.metrics_enabled is set
+router = APIRouter(
+    tags=["Metrics"]
+)
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Prometheus metrics", response_description="Metrics in the Prometheus text format")
+async def get_metrics():
+    """
+    Report per-route request metrics for Prometheus.
+
+    - **http_requests_in_flight**: Requests being served right now
+    - **http_request_duration_seconds**: Latency histogram per method and route template
+    - **http_responses_total**: Responses per method, route template and status code
+    """
+    # async def keeps the scrape on the event loop, the thread that writes the counters
+    return PlainTextResponse(request_metrics.render_prometheus(), media_type=PROMETHEUS_MEDIA_TYPE)
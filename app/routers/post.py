@@ -1,85 +1,271 @@
+import codecs
+from datetime import datetime
 from typing import Optional, List
-from fastapi import FastAPI, HTTPException, Response, status, Depends, APIRouter
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import FastAPI, HTTPException, Query, Request, Response, status, Depends, APIRouter
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from sqlalchemy import delete, func, select, tuple_, update
 
-from .. import models, schemas, ultils, oauth2
-from ..database import engine, get_db
+from .. import models, schemas, ultils, oauth2, pagination, conditional
+from ..export import NDJSON_MEDIA_TYPE, stream_ndjson
+from ..bulk_import import BulkImport, ImportAborted, ImportFormat, RecordReader
+from ..responses import FastJSONResponse
+from ..search import PostSort, SearchMode, build_tsquery
+from ..config import settings
+from ..database import get_read_session, get_read_session_factory, get_session
+from ..vote_buffer import vote_buffer
 
 router = APIRouter(
     prefix="/posts",
     tags=["Posts"]
 )
 
+def _owner_loader():
+    """
+    Eager loading option for `Post.owner`, chosen by `settings.post_owner_loading`.
+
+    `joined` adds a LEFT OUTER JOIN on users to the post query, `selectin` sends one
+    extra `SELECT ... WHERE users.id IN (...)` per page. Either way the number of
+    statements does not grow with the page size.
+    """
+    if settings.post_owner_loading == "selectin":
+        return selectinload(models.Post.owner)
+    return joinedload(models.Post.owner)
+
+async def _get_post(db: AsyncSession, post_id: int):
+    """
+    Loads a post and its owner in one query, refreshing any copy already in the session.
+    """
+    return await db.scalar(
+        select(models.Post)
+        .options(_owner_loader()) # Owner is serialized with every post, never lazy load it
+        .where(models.Post.id == post_id)
+        .execution_options(populate_existing=True)
+    )
+
+def _parse_fields(fields: Optional[str]) -> Optional[set]:
+    """
+    Parses the comma separated `fields` query parameter of the post list.
+
+    Returns:
+        Optional[set]: Requested names from `schemas.POST_FIELDS` plus `id`, or None for every field.
+    """
+    if not fields or not fields.strip():
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(schemas.POST_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Choose from: {', '.join(schemas.POST_FIELDS)}"
+        )
+    return requested | {"id"}
+
+def _sparse_load(fields: set):
+    """
+    Loader options fetching only the requested columns of `Post`.
+
+    `created_at`, `updated_at` and `vote_count` are always loaded for the cursor, the
+    ETag and the vote count. The owner is only joined when it is requested.
+    """
+    columns = {"id", "created_at", "updated_at", "vote_count"} | (fields - {"owner"})
+    if "owner" not in fields:
+        return [load_only(*(getattr(models.Post, name) for name in columns))]
+    columns.add("owner_id") # The owner is loaded through this key
+    return [load_only(*(getattr(models.Post, name) for name in columns)), _owner_loader()]
+
+def _votes(post) -> int:
+    """
+    Returns the vote count of a post, including write-behind votes not flushed yet.
+    """
+    if settings.vote_write_behind:
+        return post.vote_count + vote_buffer.pending_delta(post.id)
+    return post.vote_count # Denormalized counter, no join on votes
+
 @router.get("/", response_model=List[schemas.PostOut], summary="Get all posts", response_description="List of all posts with vote counts")
-def get_posts(
-    db: Session = Depends(get_db),
+async def get_posts(
+    request: Request,
+    db: AsyncSession = Depends(get_read_session),
     current_user: int = Depends(oauth2.get_current_user),
     limit: int = 10,
     skip: int = 0,
-    search: Optional[str] = ""
+    search: Optional[str] = "",
+    search_mode: SearchMode = SearchMode.prefix,
+    sort: PostSort = PostSort.recent,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
 ):
     """
     Retrieve all posts with pagination, optional search filter, and vote counts.
 
+    Posts are ordered newest first. When a page is full, the `X-Next-Cursor`
+    response header holds the cursor of the following page. The page carries
+    an `ETag`, send it back in `If-None-Match` to get a `304` when nothing changed.
+
     - **limit**: Max number of posts to return (default: 10)
-    - **skip**: Number of posts to skip for pagination
-    - **search**: Filter posts by title containing this string
+    - **skip**: Number of posts to skip for pagination (ignored when `cursor` is given)
+    - **search**: Filter posts by words in their title or content (empty means no filter)
+    - **search_mode**: `prefix` (default), `fulltext` or legacy `title` substring matching
+    - **sort**: `recent` (default) or `relevance` to rank full-text matches first
+    - **cursor**: Opaque cursor from a previous `X-Next-Cursor` header (keyset pagination, `recent` sort only)
+    - **fields**: Comma separated post fields to return, e.g. `title,owner` for a feed (default: all).
+      `id` and `votes` are always included, unrequested columns are not fetched from the database
+    - **returns**: List of posts with vote counts
+    """
+    selected = _parse_fields(fields)
+    post_query = select(models.Post).options(*(_sparse_load(selected) if selected else [_owner_loader()]))
+
+    # Skip the filter entirely for an empty search instead of matching LIKE '%%'
+    search = (search or "").strip()
+    rank = None
+    if search and search_mode == SearchMode.title:
+        post_query = post_query.where(models.Post.title.contains(search))
+    elif search:
+        tsquery = build_tsquery(search, search_mode)
+        if tsquery is None:
+            return []
+        post_query = post_query.where(models.Post.search_vector.bool_op("@@")(tsquery)) # Uses ix_posts_search_vector
+        rank = func.ts_rank_cd(models.Post.search_vector, tsquery)
+
+    if sort == PostSort.relevance:
+        if rank is None or cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Relevance sort requires a full-text search and does not support cursors"
+            )
+        post_query = post_query.order_by(rank.desc())
+
+    post_query = post_query.order_by(models.Post.created_at.desc(), models.Post.id.desc()) # Matches ix_posts_created_at_id
+
+    if cursor:
+        # Keyset pagination: seek past the last row instead of scanning skipped ones
+        created_at, post_id = pagination.decode_cursor(cursor)
+        post_query = post_query.where(
+            tuple_(models.Post.created_at, models.Post.id) < tuple_(created_at, post_id)
+        )
+    else:
+        post_query = post_query.offset(skip)
+
+    results = (await db.scalars(post_query.limit(limit))).all()
+
+    votes = [_votes(post) for post in results]
+    versions = list(map(conditional.post_version, results, votes))
+    if selected:
+        versions.append(",".join(sorted(selected))) # Each fieldset is a different representation
+    headers = {"ETag": conditional.make_etag(versions)}
+    if sort == PostSort.recent and results and len(results) == limit:
+        last_post = results[-1]
+        headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(last_post.created_at, last_post.id)
+
+    if conditional.is_not_modified(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Trusted DB rows encoded straight to bytes, FastAPI skips the response_model pass
+    posts = [schemas.PostOut.from_row(post, post_votes, selected) for post, post_votes in zip(results, votes)]
+    include = {"__all__": {"post": selected, "votes": True}} if selected else None
+    return FastJSONResponse(posts, headers=headers, include=include)
+
+@router.get("/trending", response_model=List[schemas.PostOut], summary="Get trending posts", response_description="Top posts by time-decayed votes")
+async def get_trending_posts(
+    db: AsyncSession = Depends(get_read_session),
+    current_user: int = Depends(oauth2.get_current_user),
+    limit: int = Query(10, ge=1, le=settings.trending_max_limit)
+):
+    """
+    Retrieve the hottest recent posts, best first.
+
+    The ranking weighs votes against age (a post's votes count half as much every
+    `settings.trending_half_life_hours`) and only covers posts of the last
+    `settings.trending_window_hours`. It is precomputed in the background every
+    `settings.trending_refresh_interval_seconds`, so new votes show up after the next refresh.
+
+    - **limit**: Number of posts to return (default: 10)
     - **returns**: List of posts with vote counts
     """
-    post_query = (
-        db.query(models.Post, func.count(models.Vote.post_id).label("Votes"))
-        .join(models.Vote, models.Vote.post_id == models.Post.id, isouter=True)
-        .group_by(models.Post.id)
-        .filter(models.Post.title.contains(search))
+    # Reads the first `limit` entries of ix_post_trending_score, then each post by primary key
+    results = (await db.scalars(
+        select(models.Post)
+        .join(models.PostTrending, models.PostTrending.post_id == models.Post.id)
+        .options(_owner_loader())
+        .order_by(models.PostTrending.score.desc(), models.PostTrending.post_id.desc())
         .limit(limit)
-        .offset(skip)
-        .all()
+    )).all()
+    return FastJSONResponse([schemas.PostOut.from_row(post, _votes(post)) for post in results])
+
+@router.get("/export", summary="Export posts as NDJSON", response_description="One JSON post per line",
+            response_class=StreamingResponse, responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}})
+async def export_posts(
+    session_factory = Depends(get_read_session_factory),
+    current_user: int = Depends(oauth2.get_current_user),
+    published: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None
+):
+    """
+    Stream every matching post with its vote count, oldest first, as newline delimited JSON.
+
+    Rows are read through a server-side cursor and written in chunks of
+    `settings.export_chunk_rows`, so memory stays flat however many posts there are.
+
+    - **published**: Only published (`true`) or unpublished (`false`) posts
+    - **created_after**: Only posts created at or after this time
+    - **created_before**: Only posts created before this time
+    - **returns**: One `{"id", "title", "content", "published", "owner_id", "created_at", "votes"}` object per line
+    """
+    query = select(
+        models.Post.id,
+        models.Post.title,
+        models.Post.content,
+        models.Post.published,
+        models.Post.owner_id,
+        models.Post.created_at,
+        models.Post.vote_count.label("votes"), # Denormalized counter, no join on votes
     )
+    if published is not None:
+        query = query.where(models.Post.published == published)
+    if created_after is not None:
+        query = query.where(models.Post.created_at >= created_after)
+    if created_before is not None:
+        query = query.where(models.Post.created_at < created_before)
+    query = query.order_by(models.Post.id)
 
-    posts = [
-        schemas.PostOut(
-            post=schemas.Post.model_validate(post),
-            votes=votes
-        )
-        for post, votes in post_query
-    ]
-    return posts
+    if settings.vote_write_behind:
+        await run_in_threadpool(vote_buffer.flush) # The export reads vote_count rows directly
+
+    # The stream opens its own session, the request's one is closed before the body is sent
+    return StreamingResponse(stream_ndjson(session_factory, query, settings.export_chunk_rows), media_type=NDJSON_MEDIA_TYPE)
 
 @router.get("/{post_id}", response_model=schemas.PostOut, summary="Get a post by ID", response_description="Post details with vote count")
-def get_post(
+async def get_post(
     post_id: int,
-    response: Response,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_session),
     current_user: int = Depends(oauth2.get_current_user)
 ):
     """
     Retrieve a single post by its ID.
 
     - **post_id**: The ID of the post to retrieve
-    - **returns**: Post details and vote count if found, 404 error if not
-    """
-    post_query = (
-        db.query(models.Post, func.count(models.Vote.post_id).label("Votes"))
-        .join(models.Vote, models.Vote.post_id == models.Post.id, isouter=True)
-        .group_by(models.Post.id)
-        .filter(models.Post.id == post_id)
-        .first()
-    )
+    - **returns**: Post details and vote count if found, 404 error if not, 304 if `If-None-Match` holds the current `ETag`
+    """
+    post = await _get_post(db, post_id)
 
-    if not post_query:
+    if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
 
-    post, votes = post_query
-    return schemas.PostOut(
-        post=schemas.Post.model_validate(post),
-        votes=votes
-    )
+    votes = _votes(post)
+    etag = conditional.make_etag([conditional.post_version(post, votes)])
+    if conditional.is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    return FastJSONResponse(schemas.PostOut.from_row(post, votes), headers={"ETag": etag})
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=schemas.Post, summary="Create a new post", response_description="The created post")
-def create_posts(
+async def create_posts(
     post: schemas.PostCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: int = Depends(oauth2.get_current_user)
 ):
     """
@@ -90,16 +276,61 @@ def create_posts(
     - **published**: Publish status (boolean)
     - **returns**: The newly created post
     """
-    created_post = models.Post(owner_id=current_user.id, **post.dict())
+    created_post = models.Post(owner_id=current_user.id, **post.model_dump())
     db.add(created_post)
-    db.commit()
-    db.refresh(created_post)
-    return created_post
+    await db.flush() # Assigns the ID
+    post_id = created_post.id
+    await db.commit()
+    return await _get_post(db, post_id)
+
+@router.post("/bulk", response_model=schemas.BulkImportResult, summary="Import posts in bulk", response_description="Per-row import report")
+async def bulk_import_posts(
+    request: Request,
+    format: Optional[ImportFormat] = None,
+    db: AsyncSession = Depends(get_session),
+    current_user: int = Depends(oauth2.get_current_user)
+):
+    """
+    Import many posts from one streamed request body, owned by the current user.
+
+    Rows are validated one by one and written with `COPY` (multi-row `INSERT` on
+    drivers without it) every `settings.bulk_import_chunk_size` rows, each chunk
+    in its own transaction. Invalid rows are skipped and reported, the body is
+    never held in memory as a whole.
+
+    - **format**: `ndjson` (one JSON post per line) or `csv` (header line with `title`, `content`, optional `published`).
+      Defaults to `csv` for a `text/csv` body, `ndjson` otherwise
+    - **returns**: Number of imported and failed rows, with the line and error of the first failures
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = ImportFormat.csv if content_type.startswith("text/csv") else ImportFormat.ndjson
+
+    reader = RecordReader(format)
+    importer = BulkImport(current_user.id, settings.bulk_import_chunk_size, settings.bulk_import_max_errors)
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        async for data in request.stream():
+            for record in reader.feed(decoder.decode(data)):
+                if importer.add(*record):
+                    await db.run_sync(importer.flush) # Blocking COPY runs off the event loop
+        for record in reader.feed(decoder.decode(b"", final=True)):
+            importer.add(*record)
+    except (UnicodeDecodeError, ImportAborted) as exc:
+        reason = "Body must be UTF-8 encoded" if isinstance(exc, UnicodeDecodeError) else str(exc)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{reason}, {importer.imported} post(s) were imported before the error"
+        )
+    for record in reader.finish():
+        importer.add(*record)
+    await db.run_sync(importer.flush)
+    return importer.result()
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a post", response_description="Post deleted successfully")
-def delete_post(
+async def delete_post(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: int = Depends(oauth2.get_current_user)
 ):
     """
@@ -108,24 +339,23 @@ def delete_post(
     - **Requires ownership**: Only the post creator can delete it
     - **returns**: 204 No Content if successful, 404/403 if not
     """
-    post_query = db.query(models.Post).filter(models.Post.id == post_id)
-    post = post_query.first()
+    owner_id = await db.scalar(select(models.Post.owner_id).where(models.Post.id == post_id))
 
-    if not post:
+    if owner_id is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
 
-    if post.owner_id != current_user.id:
+    if owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
 
-    post_query.delete(synchronize_session=False)
-    db.commit()
+    await db.execute(delete(models.Post).where(models.Post.id == post_id))
+    await db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.put("/{post_id}", response_model=schemas.Post, summary="Update a post", response_description="The updated post")
-def update_post(
+async def update_post(
     post_id: int,
     updated_post: schemas.PostCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: int = Depends(oauth2.get_current_user)
 ):
     """
@@ -134,15 +364,19 @@ def update_post(
     - **Requires ownership**: Only the post creator can update it
     - **returns**: The updated post object if successful
     """
-    post_query = db.query(models.Post).filter(models.Post.id == post_id)
-    post = post_query.first()
+    owner_id = await db.scalar(select(models.Post.owner_id).where(models.Post.id == post_id))
 
-    if not post:
+    if owner_id is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
 
-    if post.owner_id != current_user.id:
+    if owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
 
-    post_query.update(updated_post.dict(), synchronize_session=False)
-    db.commit()
-    return post_query.first()
+    await db.execute(
+        update(models.Post)
+        .where(models.Post.id == post_id)
+        .values(**updated_post.model_dump())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return await _get_post(db, post_id)
@@ -1,9 +1,12 @@
 from typing import Optional, List
-from fastapi import FastAPI, HTTPException, Response, status, Depends, APIRouter
-from sqlalchemy.orm import Session
+from fastapi import FastAPI, HTTPException, Request, Response, status, Depends, APIRouter
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from .. import models, schemas, ultils
-from ..database import engine, get_db
+from .. import models, schemas, ultils, ratelimit, oauth2, pagination, conditional
+from ..database import get_read_session, get_session
+from ..responses import FastJSONResponse
+from .post import _owner_loader, _votes
 
 # Create a router
 router = APIRouter(
@@ -15,24 +18,26 @@ router = APIRouter(
     "/",
     status_code=status.HTTP_201_CREATED,
     response_model=schemas.UserOut,
+    dependencies=[Depends(ratelimit.limit_signup)], # Runs first: a 429 before bcrypt and the insert
     summary="Create a new user",
     response_description="The created user details"
 )
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_session)):
     """
     Create a new user account.
 
     - **email**: User's email address (must be unique)
     - **password**: Plaintext password (will be hashed before storing)
     - **other fields**: Any additional fields defined in the `UserCreate` schema
+    - **429**: Too many signups from this IP or for this email, see `Retry-After`.
     """
-    # Hash the password before saving
-    user.password = ultils.hash(user.password)
+    # Hash the password before saving, on the bounded hashing executor (503 when saturated)
+    user.password = await ultils.hash_async(user.password)
 
-    created_user = models.User(**user.dict())
+    created_user = models.User(**user.model_dump())
     db.add(created_user)
-    db.commit()
-    db.refresh(created_user)
+    await db.commit()
+    await db.refresh(created_user)
 
     return created_user
 
@@ -42,14 +47,14 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     summary="Retrieve a user by ID",
     response_description="Details of the user with the given ID"
 )
-def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_read_session)):
     """
     Get a user by their unique ID.
 
     - **user_id**: The ID of the user to retrieve
     - **returns**: A user object if found, 404 error otherwise
     """
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
 
     if not user:
         raise HTTPException(
@@ -58,3 +63,63 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
         )
 
     return user
+
+@router.get(
+    "/{user_id}/posts",
+    response_model=List[schemas.PostOut],
+    summary="Get the posts of a user",
+    response_description="The user's posts with vote counts, newest first"
+)
+async def get_user_posts(
+    user_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_session),
+    current_user: int = Depends(oauth2.get_current_user),
+    limit: int = 10,
+    cursor: Optional[str] = None
+):
+    """
+    Retrieve the posts of one user, newest first.
+
+    When a page is full, the `X-Next-Cursor` response header holds the cursor of
+    the following page. The page carries an `ETag`, send it back in `If-None-Match`
+    to get a `304` when nothing changed.
+
+    - **user_id**: The ID of the author
+    - **limit**: Max number of posts to return (default: 10)
+    - **cursor**: Opaque cursor from a previous `X-Next-Cursor` header
+    - **returns**: List of posts with vote counts, 404 error if the user does not exist
+    """
+    # Range scan of ix_posts_owner_id_created_at_id, the rows come out in index order
+    post_query = (
+        select(models.Post)
+        .options(_owner_loader())
+        .where(models.Post.owner_id == user_id)
+        .order_by(models.Post.created_at.desc(), models.Post.id.desc())
+    )
+    if cursor:
+        created_at, post_id = pagination.decode_cursor(cursor)
+        post_query = post_query.where(
+            tuple_(models.Post.created_at, models.Post.id) < tuple_(created_at, post_id)
+        )
+
+    results = (await db.scalars(post_query.limit(limit))).all()
+
+    # Only an empty first page needs to tell a missing user from one without posts
+    if not results and not cursor and not await db.get(models.User, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    votes = [_votes(post) for post in results]
+    headers = {"ETag": conditional.make_etag(list(map(conditional.post_version, results, votes)))}
+    if results and len(results) == limit:
+        last_post = results[-1]
+        headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(last_post.created_at, last_post.id)
+
+    if conditional.is_not_modified(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    posts = [schemas.PostOut.from_row(post, post_votes) for post, post_votes in zip(results, votes)]
+    return FastJSONResponse(posts, headers=headers)
@@ -1,9 +1,14 @@
 from typing import Optional, List
 from fastapi import FastAPI, HTTPException, Response, status, Depends, APIRouter
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import models, schemas, ultils, oauth2
-from ..database import engine, get_db
+from ..config import settings
+from ..database import get_session
+from ..vote_buffer import vote_buffer
 
 # Create a router for vote-related operations
 router = APIRouter(
@@ -17,9 +22,9 @@ router = APIRouter(
     summary="Vote or remove vote on a post",
     response_description="Confirmation message"
 )
-def vote(
+async def vote(
     vote: schemas.Vote,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_session),
     current_user: int = Depends(oauth2.get_current_user)
 ):
     """
@@ -32,22 +37,21 @@ def vote(
 
     This endpoint allows an authenticated user to either vote on a post or remove their vote.
     If a user tries to vote twice or remove a non-existent vote, appropriate errors are returned.
+    With `vote_write_behind` enabled the change is buffered and written in the next batch.
     """
 
     # Ensure the post exists
-    post = db.query(models.Post).filter(models.Post.id == vote.post_id).first()
+    post = await db.scalar(select(models.Post.id).where(models.Post.id == vote.post_id))
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not exists"
         )
 
-    # Check for existing vote
-    vote_query = db.query(models.Vote).filter(
-        models.Vote.post_id == vote.post_id,
-        models.Vote.user_id == current_user.id
-    )
-    found_vote = vote_query.first()
+    # Check for existing vote, buffered changes are newer than the database
+    found_vote = vote_buffer.state(current_user.id, vote.post_id) if settings.vote_write_behind else None
+    if found_vote is None:
+        found_vote = await db.get(models.Vote, (vote.post_id, current_user.id))
 
     # If direction is 1, try to add a vote
     if vote.dir == 1:
@@ -57,9 +61,13 @@ def vote(
                 detail="User has already voted on this post"
             )
 
+        if settings.vote_write_behind:
+            vote_buffer.put(current_user.id, vote.post_id, 1)
+            return {"message": "Successfully voted"}
+
         new_vote = models.Vote(post_id=vote.post_id, user_id=current_user.id)
         db.add(new_vote)
-        db.commit()
+        await db.commit()
         return {"message": "Successfully voted"}
 
     # If direction is 0, try to remove vote
@@ -70,6 +78,96 @@ def vote(
                 detail="User has not voted on this post"
             )
 
-        vote_query.delete(synchronize_session=False)
-        db.commit()
+        if settings.vote_write_behind:
+            vote_buffer.put(current_user.id, vote.post_id, 0)
+            return {"message": "Successfully removed vote"}
+
+        await db.execute(
+            delete(models.Vote).where(
+                models.Vote.post_id == vote.post_id,
+                models.Vote.user_id == current_user.id
+            )
+        )
+        await db.commit()
         return {"message": "Successfully removed vote"}
+
+@router.post(
+    "/batch",
+    response_model=List[schemas.VoteResult],
+    summary="Apply many votes at once",
+    response_description="Outcome of every vote in request order"
+)
+async def vote_batch(
+    votes: schemas.VoteBatch,
+    db: AsyncSession = Depends(get_session),
+    current_user: int = Depends(oauth2.get_current_user)
+):
+    """
+    Cast or remove up to 500 votes in a single transaction.
+
+    - **body**: List of `{post_id, dir}` items, same as `POST /vote/`
+    - **returns**: One `{post_id, dir, status}` per item, in request order
+
+    When several items target the same post, the last one wins and the others are
+    reported as `superseded`. Items never fail the whole batch: conflicts and missing
+    posts are reported per item instead of as 404/409 errors. Batches are always
+    written directly, after flushing any buffered write-behind votes (503 if that fails,
+    the batch would otherwise be overtaken by older buffered votes).
+    """
+    if settings.vote_write_behind:
+        try:
+            await run_in_threadpool(vote_buffer.flush)
+        except Exception: # Logged and re-queued by the buffer
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Buffered votes could not be written, try again later",
+                headers={"Retry-After": "1"}
+            )
+
+    # Last item per post wins
+    final = {item.post_id: index for index, item in enumerate(votes)}
+
+    # FOR KEY SHARE: the posts found cannot be deleted before this transaction commits
+    existing = set((await db.scalars(
+        select(models.Post.id).where(models.Post.id.in_(final)).with_for_update(read=True, key_share=True)
+    )).all())
+    to_add = [post_id for post_id, index in final.items() if post_id in existing and votes[index].dir == 1]
+    to_remove = [post_id for post_id, index in final.items() if post_id in existing and votes[index].dir != 1]
+
+    # One set-based statement per direction, existing rows are skipped instead of raising.
+    # Votes are selected from posts, a post that is gone can never violate the foreign key.
+    added = set()
+    if to_add:
+        added = set((await db.scalars(
+            insert(models.Vote)
+            .from_select(
+                ["post_id", "user_id"],
+                select(models.Post.id, literal(current_user.id)).where(models.Post.id.in_(to_add))
+            )
+            .on_conflict_do_nothing(index_elements=[models.Vote.post_id, models.Vote.user_id])
+            .returning(models.Vote.post_id)
+        )).all())
+
+    removed = set()
+    if to_remove:
+        removed = set((await db.scalars(
+            delete(models.Vote)
+            .where(models.Vote.user_id == current_user.id, models.Vote.post_id.in_(to_remove))
+            .returning(models.Vote.post_id)
+            .execution_options(synchronize_session=False)
+        )).all())
+
+    await db.commit()
+
+    results = []
+    for index, item in enumerate(votes):
+        if final[item.post_id] != index:
+            status_ = "superseded"
+        elif item.post_id not in existing:
+            status_ = "post_not_found"
+        elif item.dir == 1:
+            status_ = "voted" if item.post_id in added else "already_voted"
+        else:
+            status_ = "removed" if item.post_id in removed else "not_voted"
+        results.append(schemas.VoteResult(post_id=item.post_id, dir=item.dir, status=status_))
+    return results
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, EmailStr
-from pydantic.types import conint
+from pydantic.types import conint, conlist
 
 # ------------------------------------------------------------
 # Pydantic Schemas for Data Validation and Serialization
@@ -67,6 +67,9 @@ class Post(PostBase):
     class Config:
         from_attributes = True
 
+# Fields of `Post` a client can pick with `GET /posts/?fields=...`
+POST_FIELDS = ("id", "title", "content", "published", "owner_id", "created_at", "owner")
+
 class PostOut(BaseModel):
     """
     Schema for outputting a post along with its vote count.
@@ -77,6 +80,51 @@ class PostOut(BaseModel):
     class Config:
         from_attributes = True
 
+    @classmethod
+    def from_row(cls, post, votes: int, fields: Optional[set] = None) -> "PostOut":
+        """
+        Builds the schema from a loaded `models.Post` without validating it.
+
+        Rows read back from the database were validated when they were written,
+        so this skips the per-field checks (notably `EmailStr` on the owner, the
+        most expensive part of a post). Only use it for ORM rows, never for input.
+
+        Args:
+            post (models.Post): The loaded post.
+            votes (int): The vote count of the post.
+            fields (Optional[set]): Names from `POST_FIELDS` to copy, all of them when None.
+                Other attributes are never read, so deferred columns are not loaded.
+        """
+        values = {name: getattr(post, name) for name in fields or POST_FIELDS if name != "owner"}
+        if fields is None or "owner" in fields:
+            owner = post.owner
+            values["owner"] = UserOut.model_construct(id=owner.id, email=owner.email, created_at=owner.created_at)
+        return cls.model_construct(post=Post.model_construct(**values), votes=votes)
+
+class BulkImportError(BaseModel):
+    """
+    A row of a bulk import that was not imported.
+
+    Attributes:
+        line (int): Line of the input where the row starts (the CSV header is line 1).
+        error (str): Why the row was rejected.
+    """
+    line: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    """
+    Report of a bulk post import.
+
+    Attributes:
+        imported (int): Rows written to the database.
+        failed (int): Rows rejected, by validation or by the database.
+        errors (List[BulkImportError]): The first failed rows, capped by `settings.bulk_import_max_errors`.
+    """
+    imported: int
+    failed: int
+    errors: List[BulkImportError]
+
 
 # ------------------------
 # Vote-Related Schemas
@@ -93,6 +141,25 @@ class Vote(BaseModel):
     post_id: int
     dir: conint(le=1)  # Constraint: vote direction must be 0 or 1
 
+# Body of POST /vote/batch, bounded so one request can't hold a huge transaction
+VoteBatch = conlist(Vote, min_length=1, max_length=500)
+
+class VoteResult(BaseModel):
+    """
+    Outcome of one item of a vote batch.
+
+    Attributes:
+        post_id (int): ID of the post from the request item.
+        dir (int): Direction from the request item.
+        status (str): What happened to the item:
+            `voted` / `removed` when applied, `already_voted` / `not_voted` when there was
+            nothing to change, `post_not_found`, or `superseded` when a later item of the
+            same batch targets the same post.
+    """
+    post_id: int
+    dir: int
+    status: Literal["voted", "removed", "already_voted", "not_voted", "post_not_found", "superseded"]
+
 
 # ------------------------
 # Token-Related Schemas
@@ -0,0 +1,51 @@
+import re
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import func
+
+# ---------------------------------------------------
+# Full-Text Search Helpers for Posts
+# ---------------------------------------------------
+
+# Text search configuration, must match the one used by posts.search_vector
+TS_CONFIG = "english"
+
+class SearchMode(str, Enum):
+    """
+    How the `search` query parameter of GET /posts is interpreted.
+
+    - **prefix**: Every word must match the start of a word in the title or content
+    - **fulltext**: Web search syntax ("quoted phrases", `or`, `-excluded`) over title and content
+    - **title**: Legacy case-sensitive substring match on the title (not indexed)
+    """
+    prefix = "prefix"
+    fulltext = "fulltext"
+    title = "title"
+
+class PostSort(str, Enum):
+    """
+    Ordering of GET /posts results.
+    """
+    recent = "recent"  # Newest first, supports cursor pagination
+    relevance = "relevance"  # Best full-text match first
+
+def build_tsquery(search: str, mode: SearchMode) -> Optional[object]:
+    """
+    Builds the `tsquery` expression for a search string.
+
+    Args:
+        search (str): The raw search string sent by the client.
+        mode (SearchMode): Either `prefix` or `fulltext`.
+
+    Returns:
+        The SQL `tsquery` expression, or None if the string holds no searchable words.
+    """
+    if mode == SearchMode.fulltext:
+        return func.websearch_to_tsquery(TS_CONFIG, search)
+
+    # Only keep word characters so user input can never break the tsquery syntax
+    terms = re.findall(r"\w+", search)
+    if not terms:
+        return None
+    return func.to_tsquery(TS_CONFIG, " & ".join(f"{term}:*" for term in terms))
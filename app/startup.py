@@ -0,0 +1,97 @@
+import logging
+import time
+from pathlib import Path
+from typing import Set
+
+from . import IMPORT_STARTED
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------
+# Startup Schema Handling and Boot Timings
+# Applied once per worker by the lifespan hook in app/main.py
+# ---------------------------------------------------
+
+# Alembic configuration of the project, next to the app package
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Filled in while the worker boots, served on /internal/startup
+timings = {
+    "import_seconds": None,  # From the first import of the app package to the end of app.main
+    "schema_seconds": None,  # Spent applying settings.startup_schema_mode
+    "boot_seconds": None,  # From the first import until the worker is ready to serve
+    "schema_mode": None,
+}
+
+class SchemaMismatchError(RuntimeError):
+    """
+    Raised at startup in `check` mode when the database is not at the Alembic head revision.
+    """
+
+def alembic_heads() -> Set[str]:
+    """
+    Returns the head revisions of the migration scripts.
+    """
+    # Deferred: Alembic is only needed by the `check` mode
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / config.get_main_option("script_location")))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+def database_revisions(engine) -> Set[str]:
+    """
+    Returns the revisions recorded in the database's `alembic_version` table (empty if there is none).
+    """
+    from alembic.runtime.migration import MigrationContext
+
+    with engine.connect() as connection:
+        return set(MigrationContext.configure(connection).get_current_heads())
+
+def check_schema(engine):
+    """
+    Verifies the database was migrated to the revision the code expects.
+
+    Raises:
+        SchemaMismatchError: If the revisions differ.
+    """
+    expected, current = alembic_heads(), database_revisions(engine)
+    if current != expected:
+        raise SchemaMismatchError(
+            f"Database schema is at {', '.join(sorted(current)) or 'no revision'}, "
+            f"the code expects {', '.join(sorted(expected))}: run `alembic upgrade head`"
+        )
+
+def prepare_schema(engine, mode: str):
+    """
+    Applies `settings.startup_schema_mode` to the primary database.
+
+    - **create_all**: Create missing tables from the models (development)
+    - **check**: Only verify the Alembic revision, one query (production, migrate first)
+    - **off**: Touch nothing, the worker does not connect until the first request
+    """
+    started = time.perf_counter()
+    if mode == "create_all":
+        from . import models
+        models.Base.metadata.create_all(bind=engine)
+    elif mode == "check":
+        check_schema(engine)
+    timings["schema_mode"] = mode
+    timings["schema_seconds"] = round(time.perf_counter() - started, 4)
+
+def imported():
+    """
+    Records the import time, called at the end of app.main.
+    """
+    timings["import_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
+
+def booted():
+    """
+    Records and logs the boot time, called when the lifespan startup is done.
+    """
+    timings["boot_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
+    logger.info(
+        "Worker ready in %.3fs (import %.3fs, schema %s %.3fs)",
+        timings["boot_seconds"], timings["import_seconds"] or 0, timings["schema_mode"], timings["schema_seconds"] or 0,
+    )
@@ -0,0 +1,205 @@
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Float, cast, create_engine, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from . import models
+from .config import settings
+from .database import engine
+from .metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------
+# Trending Posts Ranking
+# Materialized in post_trending, served by GET /posts/trending
+# ---------------------------------------------------
+
+# Advisory lock held by the one worker that refreshes the ranking
+REFRESH_LOCK_KEY = 0x7472656E64  # "trend"
+
+def score_expression(half_life_seconds: float):
+    """
+    SQL expression of the trending score of a post:
+
+        log2(1 + votes) + created_at / half_life
+
+    Comparing two posts by this score is the same as comparing
+    `(1 + votes) * 2 ** (-age / half_life)`: a post's weight halves every half-life.
+    Writing it against a fixed epoch instead of the current time keeps the score
+    constant while the votes do not change, so only rows whose vote count moved
+    have to be rewritten.
+    """
+    return (
+        func.ln(1 + func.greatest(models.Post.vote_count, 0)) / math.log(2)
+        + cast(func.extract("epoch", models.Post.created_at), Float) / half_life_seconds
+    )
+
+def refresh(db, full: bool = False) -> int:
+    """
+    Brings `post_trending` up to date with the posts of the trending window, in one transaction.
+
+    Posts of the window are read through `ix_posts_created_at_id`. Only new posts and
+    posts whose vote count changed are written, unless `full` (needed after the half-life
+    setting changed). Posts that left the window are removed, deleted posts are removed by
+    the foreign key cascade.
+
+    Args:
+        db (Session): A sync session on the primary database.
+        full (bool): Rewrite every row of the window.
+
+    Returns:
+        int: Rows inserted, updated or removed.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.trending_window_hours)
+    half_life_seconds = settings.trending_half_life_hours * 3600
+
+    window = select(
+        models.Post.id,
+        score_expression(half_life_seconds),
+        models.Post.vote_count,
+        models.Post.created_at,
+    ).where(models.Post.created_at >= cutoff)
+    upsert = insert(models.PostTrending).from_select(["post_id", "score", "vote_count", "created_at"], window)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[models.PostTrending.post_id],
+        set_={"score": upsert.excluded.score, "vote_count": upsert.excluded.vote_count},
+        where=None if full else models.PostTrending.vote_count != upsert.excluded.vote_count,
+    )
+    written = db.execute(upsert).rowcount
+    removed = db.execute(delete(models.PostTrending).where(models.PostTrending.created_at < cutoff)).rowcount
+    db.commit()
+    return written + removed
+
+class TrendingRefresher:
+    """
+    Refreshes the trending ranking every `interval` seconds in a background thread.
+
+    Every worker runs the thread, but only the one holding the `REFRESH_LOCK_KEY`
+    advisory lock refreshes: the others try to take it over each interval, which
+    happens when the leader exits (its connection closes and the lock is released).
+    The leader refreshes over the connection holding the lock, opened outside the
+    request pool. Its first refresh is a full one, so a changed half-life setting
+    takes effect on the next deploy.
+
+    Attributes:
+        leader (bool): This worker holds the lock and refreshes the ranking.
+        refresh_latency (LatencyHistogram): Duration of each refresh.
+        refreshes (int): Successful refreshes.
+        failed_refreshes (int): Refreshes that raised, retried at the next interval.
+        rows_written (int): Rows written or removed by the last refresh.
+        last_refresh (Optional[datetime]): When the last successful refresh finished.
+    """
+
+    def __init__(self, engine, interval: float):
+        self.engine = create_engine(engine.url, poolclass=NullPool)
+        self.interval = interval
+        self.leader = False
+        self.refresh_latency = LatencyHistogram()
+        self.refreshes = 0
+        self.failed_refreshes = 0
+        self.rows_written = 0
+        self.last_refresh = None
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def lead(self):
+        """
+        Tries to take the refresh lock.
+
+        Returns:
+            The connection holding the lock, to refresh with and close to give it up,
+            or None when another worker holds it.
+        """
+        connection = self.engine.connect()
+        try:
+            acquired = connection.scalar(select(func.pg_try_advisory_lock(REFRESH_LOCK_KEY)))
+            connection.commit()  # A session-level lock outlives the transaction
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return None
+        return connection
+
+    def refresh(self, connection, full: bool = False) -> int:
+        """
+        Runs one refresh on the leader connection and records its outcome.
+        """
+        started = time.perf_counter()
+        with Session(bind=connection) as db:
+            rows = refresh(db, full)
+        self.refresh_latency.observe(time.perf_counter() - started)
+        self.refreshes += 1
+        self.rows_written = rows
+        self.last_refresh = datetime.now(timezone.utc)
+        return rows
+
+    def _run(self):
+        connection = None
+        try:
+            while True:
+                try:
+                    if connection is None:
+                        connection = self.lead()
+                        full = True  # Another worker may have refreshed with other settings
+                    if connection is not None:
+                        self.leader = True
+                        self.refresh(connection, full)
+                        full = False
+                except Exception:
+                    self.failed_refreshes += 1
+                    logger.exception("Trending refresh failed, retrying in %ss", self.interval)
+                    if connection is not None:
+                        connection.close()  # Gives up the lock, it may be broken
+                        connection = None
+                    self.leader = False
+                if self._stopping.wait(self.interval):
+                    return
+        finally:
+            if connection is not None:
+                connection.close()
+            self.leader = False
+
+    def start(self):
+        """
+        Starts the refresh thread, the first refresh runs right away without delaying startup.
+        """
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="trending-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the refresh thread. Called on application shutdown.
+        """
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        """
+        Returns the refresh counters.
+        """
+        return {
+            "enabled": settings.trending_enabled,
+            "leader": self.leader,
+            "refreshes": self.refreshes,
+            "failed_refreshes": self.failed_refreshes,
+            "rows_written": self.rows_written,
+            "last_refresh": self.last_refresh,
+            "refresh_latency_seconds": self.refresh_latency.snapshot(),
+        }
+
+# Shared refresher, started by the lifespan hook when settings.trending_enabled is set
+trending_refresher = TrendingRefresher(engine, interval=settings.trending_refresh_interval_seconds)
@@ -1,7 +1,25 @@
-from passlib.context import CryptContext
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-# Initialize the password hashing context using bcrypt algorithm
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from fastapi import HTTPException, status
+
+from .config import settings
+from .metrics import LatencyHistogram
+
+# Password hashing context using bcrypt, created on first use so importing the app stays fast
+_pwd_context = None
+
+def get_pwd_context():
+    """
+    Returns the bcrypt `CryptContext`, importing passlib the first time.
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 def hash(password: str) -> str:
     """
@@ -13,7 +31,7 @@ def hash(password: str) -> str:
     Returns:
         str: A bcrypt-hashed version of the password.
     """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify(plain_password: str, hashed_password: str) -> bool:
     """
@@ -26,4 +44,113 @@ def verify(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if the passwords match, False otherwise.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+# ---------------------------------------------------
+# Bounded Executor for bcrypt, keeps hashing off the event loop
+# ---------------------------------------------------
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0  # Calls admitted and not finished yet, queued or running
+_pending_lock = threading.Lock()
+_rejected = 0
+_timeouts = 0
+
+# Time between submission and a worker picking the call up
+queue_wait = LatencyHistogram()
+# Total time of each call, queue wait included
+call_latency = {"hash": LatencyHistogram(), "verify": LatencyHistogram()}
+
+def _get_executor():
+    """
+    Creates the hashing executor on first use from the hashing_* settings.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            executor_class = ProcessPoolExecutor if settings.hashing_executor == "process" else ThreadPoolExecutor
+            _executor = executor_class(max_workers=settings.hashing_max_workers)
+        return _executor
+
+def shutdown_executor():
+    """
+    Stops the hashing executor, waiting for running calls. Called on application shutdown.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+def _timed_call(fn, *args):
+    # Runs in the worker, the start time splits queue wait from hashing time
+    return time.monotonic(), fn(*args)
+
+def _busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, try again later",
+        headers={"Retry-After": "1"},
+    )
+
+async def _run(name: str, fn, *args):
+    """
+    Runs a hashing function on the executor with admission control.
+
+    Raises:
+        HTTPException: 503 Service Unavailable when `hashing_max_pending` calls are
+        already in flight, or when the call waited `hashing_queue_timeout_seconds`
+        without reaching a worker.
+    """
+    global _pending, _rejected, _timeouts
+    with _pending_lock:
+        if _pending >= settings.hashing_max_pending:
+            _rejected += 1
+            raise _busy()
+        _pending += 1
+
+    try:
+        enqueued = time.monotonic()
+        future = _get_executor().submit(_timed_call, fn, *args)
+        waiter = asyncio.wrap_future(future)
+
+        done, _ = await asyncio.wait({waiter}, timeout=settings.hashing_queue_timeout_seconds)
+        if not done and future.cancel(): # Still queued, give up before burning any CPU on it
+            with _pending_lock:
+                _timeouts += 1
+            raise _busy()
+
+        started, result = await waiter
+        queue_wait.observe(started - enqueued)
+        call_latency[name].observe(time.monotonic() - enqueued)
+        return result
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+async def hash_async(password: str) -> str:
+    """
+    Async variant of `hash` that runs bcrypt on the bounded hashing executor.
+    """
+    return await _run("hash", hash, password)
+
+async def verify_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Async variant of `verify` that runs bcrypt on the bounded hashing executor.
+    """
+    return await _run("verify", verify, plain_password, hashed_password)
+
+def hashing_stats() -> dict:
+    """
+    Returns the admission counters and latency histograms of the hashing executor.
+    """
+    return {
+        "executor": settings.hashing_executor,
+        "max_workers": settings.hashing_max_workers,
+        "pending": _pending,
+        "rejected": _rejected,
+        "queue_timeouts": _timeouts,
+        "queue_wait_seconds": queue_wait.snapshot(),
+        "latency_seconds": {name: histogram.snapshot() for name, histogram in call_latency.items()},
+    }
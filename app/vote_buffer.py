@@ -0,0 +1,231 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import Integer, column, delete, select, tuple_, values
+from sqlalchemy.dialects.postgresql import insert
+
+from . import models
+from .config import settings
+from .database import SessionLocal
+from .metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------
+# Write-Behind Buffer for Votes
+# Enabled with settings.vote_write_behind
+# ---------------------------------------------------
+
+def _insert_votes(keys: list):
+    """
+    `INSERT ... SELECT` of buffered votes, joined with posts and users so votes on
+    a post or by a user deleted since they were buffered are dropped instead of
+    failing the whole batch. `FOR KEY SHARE` keeps the joined rows from being
+    deleted before the insert commits.
+    """
+    buffered = values(column("user_id", Integer), column("post_id", Integer), name="buffered").data(keys)
+    rows = (
+        select(buffered.c.user_id, buffered.c.post_id)
+        .join(models.Post, models.Post.id == buffered.c.post_id)
+        .join(models.User, models.User.id == buffered.c.user_id)
+        .with_for_update(read=True, key_share=True, of=[models.Post, models.User])
+    )
+    return insert(models.Vote).from_select(["user_id", "post_id"], rows).on_conflict_do_nothing()
+
+class VoteBuffer:
+    """
+    Collects vote changes in memory and writes them in batches.
+
+    Entries are deduplicated per `(user_id, post_id)`: a vote followed by an
+    unvote cancels out before it ever reaches the database. A background thread
+    flushes every `flush_interval` seconds, or as soon as `max_items` entries
+    are pending, with one multi-row INSERT and one multi-row DELETE.
+
+    Callers must validate each change against `state()` (or the database) first,
+    so every buffered entry moves its post's vote count by exactly one.
+
+    Attributes:
+        flush_latency (LatencyHistogram): Duration of each flush.
+        flushed (int): Entries written to the database so far.
+        failed_flushes (int): Flushes that raised and were re-queued.
+    """
+
+    def __init__(self, session_factory, flush_interval: float, max_items: int):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_items = max_items
+        self.flush_latency = LatencyHistogram()
+        self.flushed = 0
+        self.failed_flushes = 0
+
+        self._pending = {}  # (user_id, post_id) -> dir, waiting for the next flush
+        self._inflight = {}  # (user_id, post_id) -> dir, being written right now
+        self._post_delta = defaultdict(int)  # post_id -> net change of pending and in-flight entries
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time keeps entries in order
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def state(self, user_id: int, post_id: int) -> Optional[bool]:
+        """
+        Returns whether the user has voted on the post according to buffered entries.
+
+        Returns:
+            Optional[bool]: True/False from the newest buffered entry, or None if the
+            database holds the current state.
+        """
+        key = (user_id, post_id)
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key] == 1
+            if key in self._inflight:
+                return self._inflight[key] == 1
+            return None
+
+    def put(self, user_id: int, post_id: int, dir: int):
+        """
+        Buffers a validated vote (`dir=1`) or unvote (`dir=0`).
+        """
+        key = (user_id, post_id)
+        change = 1 if dir == 1 else -1
+        with self._lock:
+            previous = self._pending.get(key)
+            if previous == dir:
+                return  # Duplicate of the pending entry
+            if previous is not None:
+                del self._pending[key]  # Opposite of the pending entry, they cancel out
+            else:
+                self._pending[key] = dir
+            self._post_delta[post_id] += change
+            full = len(self._pending) >= self.max_items
+
+        self.start()
+        if full:
+            self._wakeup.set()
+
+    def pending_delta(self, post_id: int) -> int:
+        """
+        Returns how much buffered entries will change the post's vote count.
+        """
+        with self._lock:
+            return self._post_delta.get(post_id, 0)
+
+    def depth(self) -> int:
+        """
+        Returns the number of entries not yet committed.
+        """
+        with self._lock:
+            return len(self._pending) + len(self._inflight)
+
+    def _settle(self, entries: dict):
+        # Caller holds self._lock, the entries are in the database or dropped
+        for (user_id, post_id), dir in entries.items():
+            self._post_delta[post_id] -= 1 if dir == 1 else -1
+            if self._post_delta[post_id] == 0:
+                del self._post_delta[post_id]
+
+    def flush(self) -> int:
+        """
+        Writes every pending entry in one transaction.
+
+        Returns:
+            int: Number of entries written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+
+            started = time.perf_counter()
+            try:
+                adds = [key for key, dir in batch.items() if dir == 1]
+                removes = [key for key, dir in batch.items() if dir != 1]
+                with self.session_factory() as db:
+                    if adds:
+                        db.execute(_insert_votes(adds))
+                    if removes:
+                        db.execute(
+                            delete(models.Vote)
+                            .where(tuple_(models.Vote.user_id, models.Vote.post_id).in_(removes))
+                            .execution_options(synchronize_session=False)
+                        )
+                    db.commit()
+            except Exception:
+                logger.exception("Vote buffer flush of %d entries failed, re-queued", len(batch))
+                with self._lock:
+                    self.failed_flushes += 1
+                    self._inflight = {}
+                    for key, dir in batch.items():
+                        if key in self._pending:
+                            # A newer entry undid this one, neither has to be written
+                            self._settle({key: dir})
+                            self._settle({key: self._pending.pop(key)})
+                        else:
+                            self._pending[key] = dir
+                raise
+            finally:
+                self.flush_latency.observe(time.perf_counter() - started)
+
+            with self._lock:
+                self._inflight = {}
+                self._settle(batch)
+                self.flushed += len(batch)
+            return len(batch)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass  # Logged and re-queued by flush, retry on the next tick
+
+    def start(self):
+        """
+        Starts the background flusher thread if it is not running.
+        """
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="vote-buffer-flusher", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """
+        Stops the flusher and drains the buffer. Called on application shutdown.
+        """
+        thread = self._thread
+        if thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        """
+        Returns the buffer depth and flush counters.
+        """
+        return {
+            "enabled": settings.vote_write_behind,
+            "depth": self.depth(),
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+            "flush_latency_seconds": self.flush_latency.snapshot(),
+        }
+
+# Shared buffer used by the vote router when write-behind is enabled
+vote_buffer = VoteBuffer(
+    SessionLocal,
+    flush_interval=settings.vote_flush_interval_ms / 1000,
+    max_items=settings.vote_flush_max_items,
+)
@@ -0,0 +1,323 @@
+"""
+Load benchmark of every router against a seeded database.
+
+Seeds users, posts and votes with app.datagen (deterministic for a given
+--seed, Zipfian votes and posts per user), then drives
+each scenario with --concurrency parallel clients and reports p50/p95/p99
+latency and requests per second:
+
+    login   POST /login
+    list    GET /posts/
+    get     GET /posts/{id}
+    create  POST /posts/
+    update  PUT /posts/{id}     (posts made by `create`)
+    delete  DELETE /posts/{id}  (posts made by `create`)
+    vote    POST /vote/
+    author  GET /users/{id}/posts
+
+Transports:
+- inprocess: the ASGI app in this process through httpx.ASGITransport (no network,
+  measures the application itself)
+- http: a real server, started with uvicorn on a free port unless --url is given
+
+Login and signup rate limiting is turned off in the benchmarked app (the login
+scenario sends every attempt from one IP for one account). Start servers given
+with --url with RATE_LIMIT_ENABLED=false.
+
+The target database comes from the usual environment variables (DATABASE_NAME,
+...). --reset DROPS AND RECREATES every table first, point it at a dedicated
+benchmark database.
+
+Usage:
+    python -m benchmarks.bench_api --reset [--users 100 --posts 10000 --votes 50000]
+        [--transport inprocess|http] [--url http://host:port] [--requests 500]
+        [--concurrency 8] [--scenarios list,get] [--output results.json]
+        [--compare baseline.json --max-regression 0.2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import func, select
+
+from app import datagen, models
+from app.config import settings
+from app.database import SessionLocal, engine
+
+BENCH_EMAIL = datagen.email_for(1)
+BENCH_PASSWORD = datagen.DEFAULT_PASSWORD
+SCENARIOS = ("login", "list", "get", "create", "update", "delete", "vote", "author")
+
+# ------------------------
+# Seeding
+# ------------------------
+
+def seed(users: int, posts: int, votes: int, seed_value: int):
+    """
+    Recreates the tables and fills them with `app.datagen`. The benchmark user is user 1.
+    """
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    datagen.generate(engine, users, posts, votes, seed=seed_value)
+
+def dataset_size() -> dict:
+    with SessionLocal() as db:
+        return {
+            "users": db.scalar(select(func.count()).select_from(models.User)),
+            "posts": db.scalar(select(func.count()).select_from(models.Post)),
+            "votes": db.scalar(select(func.count()).select_from(models.Vote)),
+        }
+
+# ------------------------
+# Transports
+# ------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@asynccontextmanager
+async def open_client(transport: str, url: str, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if transport == "inprocess":
+        from app.main import app
+        settings.rate_limit_enabled = False
+        async with app.router.lifespan_context(app):  # ASGITransport does not run the lifespan
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", limits=limits) as client:
+                yield client
+        return
+
+    server = None
+    if not url:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            env={**os.environ, "RATE_LIMIT_ENABLED": "false"},
+        )
+    try:
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+            for _ in range(100):  # Wait up to 10s for the server to accept connections
+                try:
+                    await client.get("/")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            yield client
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+# ------------------------
+# Scenarios
+# ------------------------
+
+def _scenarios(headers: dict, post_ids: list, author_ids: list, created: list):
+    """
+    Builds `name -> (request(client, index), accepted status codes)`.
+    """
+    async def login(client, index):
+        return await client.post("/login", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD})
+
+    async def list_posts(client, index):
+        return await client.get("/posts/", params={"limit": 10, "skip": (index * 10) % max(len(post_ids), 1)}, headers=headers)
+
+    async def get_post(client, index):
+        return await client.get(f"/posts/{post_ids[index % len(post_ids)]}", headers=headers)
+
+    async def create(client, index):
+        res = await client.post("/posts/", json={"title": f"Bench {index}", "content": "Created by the benchmark"}, headers=headers)
+        if res.status_code == 201:
+            created.append(res.json()["id"])
+        return res
+
+    async def update(client, index):
+        return await client.put(f"/posts/{created[index % len(created)]}", json={"title": f"Updated {index}", "content": "Updated"}, headers=headers)
+
+    async def delete(client, index):
+        return await client.delete(f"/posts/{created[index]}", headers=headers)
+
+    async def vote(client, index):
+        # The first pass over the posts votes, the next one removes the votes again
+        dir = 1 if (index // len(post_ids)) % 2 == 0 else 0
+        return await client.post("/vote/", json={"post_id": post_ids[index % len(post_ids)], "dir": dir}, headers=headers)
+
+    async def author_posts(client, index):
+        return await client.get(f"/users/{author_ids[index % len(author_ids)]}/posts", params={"limit": 10}, headers=headers)
+
+    return {
+        "login": (login, {200}),
+        "list": (list_posts, {200}),
+        "get": (get_post, {200}),
+        "create": (create, {201}),
+        "update": (update, {200}),
+        "delete": (delete, {204}),
+        "vote": (vote, {201, 409}),  # 409 when the user already voted before this run
+        "author": (author_posts, {200}),
+    }
+
+def _percentile(ordered: list, fraction: float) -> float:
+    # Nearest-rank percentile of a sorted list
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+async def run_scenario(client, request, accepted: set, requests: int, concurrency: int, warmup: int) -> dict:
+    """
+    Sends `requests` requests from `concurrency` workers after `warmup` unmeasured ones.
+    """
+    for index in range(warmup):
+        await request(client, requests + index)
+
+    latencies, errors = [], {}
+    indexes = iter(range(requests))
+
+    async def worker():
+        for index in indexes:
+            started = time.perf_counter()
+            try:
+                res = await request(client, index)
+                status = res.status_code
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            latencies.append(time.perf_counter() - started)
+            if status not in accepted:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 2),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+async def run(args) -> dict:
+    with SessionLocal() as db:
+        post_ids = list(db.scalars(select(models.Post.id).order_by(models.Post.id).limit(10000)))
+        author_ids = list(db.scalars(select(models.Post.owner_id).where(models.Post.id.in_(post_ids)).distinct()))
+    if not post_ids:
+        raise SystemExit("The database has no posts, run with --reset to seed it")
+
+    results = {}
+    async with open_client(args.transport, args.url, args.concurrency) as client:
+        res = await client.post("/login", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD})
+        if res.status_code != 200:
+            raise SystemExit(f"Login as {BENCH_EMAIL} failed ({res.status_code}), run with --reset to seed the database")
+        headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+        created = []
+        scenarios = _scenarios(headers, post_ids, author_ids, created)
+        for name in args.scenarios:
+            request, accepted = scenarios[name]
+            # update and delete reuse the posts made by create, delete must not run out of them
+            warmup = 0 if name in ("update", "delete") else args.warmup
+            requests = min(args.requests, len(created)) if name in ("update", "delete") else args.requests
+            if requests == 0:
+                print(f"{name:>7}: skipped, needs the create scenario first")
+                continue
+            results[name] = await run_scenario(client, request, accepted, requests, args.concurrency, warmup)
+            result = results[name]
+            print(f"{name:>7}: {result['rps']:9.1f} req/s  p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  errors {result['errors'] or 0}")
+    return results
+
+# ------------------------
+# Reporting
+# ------------------------
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """
+    Lists the scenarios whose p95 latency grew by more than `max_regression` over the baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before["p95_ms"]:
+            continue
+        change = result["p95_ms"] / before["p95_ms"] - 1
+        print(f"{name:>7}: p95 {before['p95_ms']:8.2f} -> {result['p95_ms']:8.2f} ms ({change:+.1%}), rps {before['rps']:.1f} -> {result['rps']:.1f}")
+        if change > max_regression:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reset", action="store_true", help="Drop, recreate and seed every table first")
+    parser.add_argument("--users", type=int, default=100, help="Users to seed")
+    parser.add_argument("--posts", type=int, default=10000, help="Posts to seed")
+    parser.add_argument("--votes", type=int, default=50000, help="Votes to seed")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the dataset")
+    parser.add_argument("--transport", choices=("inprocess", "http"), default="inprocess")
+    parser.add_argument("--url", help="Server to benchmark with --transport http (default: start uvicorn)")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS), help="Comma separated subset of " + ",".join(SCENARIOS))
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file from an earlier run")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 growth over the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.reset:
+        started = time.perf_counter()
+        seed(args.users, args.posts, args.votes, args.seed)
+        print(f"seeded in {time.perf_counter() - started:.1f}s")
+
+    results = asyncio.run(run(args))
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "transport": args.transport,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "seed": args.seed,
+            "dataset": dataset_size(),
+            "database_async": settings.database_async,
+            "database_pool_mode": settings.database_pool_mode,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.max_regression)
+        if regressions:
+            print(f"p95 regressed by more than {args.max_regression:.0%}: {', '.join(regressions)}")
+            sys.exit(1)  # Non-zero so CI can block the deploy
+
+if __name__ == "__main__":
+    main()
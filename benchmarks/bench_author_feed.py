@@ -0,0 +1,148 @@
+"""
+Benchmark of the per-author feed query behind GET /users/{user_id}/posts.
+
+Seeds a million posts with app.datagen (posts per user are Zipfian, so there are
+prolific and occasional authors), then times the feed query for the most
+prolific author and a median one, on the first page and on a deep page reached
+through the cursor:
+- with ix_posts_owner_id_created_at_id (the plan must be a single index scan)
+- without it: the index is dropped inside a transaction that is rolled back, so
+  the database is left unchanged (the table is locked meanwhile)
+
+The target database comes from the usual environment variables (DATABASE_NAME,
+...). --reset DROPS AND RECREATES every table first, point it at a dedicated
+benchmark database.
+
+Usage:
+    python -m benchmarks.bench_author_feed --reset [--users 10000 --posts 1000000 --votes 1000000]
+        [--limit 10] [--depth 50] [--repeat 50] [--output results.json]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import func, select, text, tuple_
+
+from app import datagen, models
+from app.database import SessionLocal, engine
+
+INDEX_NAME = "ix_posts_owner_id_created_at_id"
+
+def feed_query(user_id: int, limit: int, position=None):
+    """
+    The page query of GET /users/{user_id}/posts (without the owner, the same for every row).
+    """
+    query = (
+        select(models.Post.id, models.Post.created_at, models.Post.title, models.Post.vote_count)
+        .where(models.Post.owner_id == user_id)
+        .order_by(models.Post.created_at.desc(), models.Post.id.desc())
+        .limit(limit)
+    )
+    if position:
+        query = query.where(tuple_(models.Post.created_at, models.Post.id) < tuple_(*position))
+    return query
+
+def pick_authors(db) -> dict:
+    """
+    Returns the most prolific author and the median one (among users with posts).
+    """
+    counts = db.execute(
+        select(models.Post.owner_id, func.count().label("posts"))
+        .group_by(models.Post.owner_id)
+        .order_by(func.count().desc(), models.Post.owner_id)
+    ).all()
+    if not counts:
+        raise SystemExit("The database has no posts, run with --reset to seed it")
+    top, median = counts[0], counts[len(counts) // 2]
+    return {"top": {"user_id": top.owner_id, "posts": top.posts}, "median": {"user_id": median.owner_id, "posts": median.posts}}
+
+def deep_position(db, user_id: int, limit: int, depth: int):
+    """
+    Follows the cursor `depth` pages down and returns its `(created_at, id)` position.
+    """
+    position = None
+    for _ in range(depth):
+        rows = db.execute(feed_query(user_id, limit, position)).all()
+        if len(rows) < limit:
+            break
+        position = (rows[-1].created_at, rows[-1].id)
+    return position
+
+def measure(db, query, repeat: int) -> dict:
+    """
+    Runs the query `repeat` times and reads the plan of one more run.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.execute(query).all()
+        timings.append(time.perf_counter() - started)
+    sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+    plan = db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")).scalar()[0]
+    node = plan["Plan"]
+    while node.get("Plans") and node["Node Type"] == "Limit":
+        node = node["Plans"][0]
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(sorted(timings)[int(len(timings) * 0.95) - 1] * 1000, 3),
+        "plan": f"{node['Node Type']} on {node.get('Index Name', node.get('Relation Name'))}",
+        "buffers": node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0),
+    }
+
+def run(args) -> dict:
+    results = {}
+    with SessionLocal() as db:
+        authors = pick_authors(db)
+        pages = {}
+        for profile, author in authors.items():
+            pages[f"{profile}/first"] = feed_query(author["user_id"], args.limit)
+            position = deep_position(db, author["user_id"], args.limit, args.depth)
+            if position:
+                pages[f"{profile}/deep"] = feed_query(author["user_id"], args.limit, position)
+
+        for name, query in pages.items():
+            results[name] = {"with_index": measure(db, query, args.repeat)}
+        db.rollback()
+
+        # DDL is transactional in PostgreSQL: the index comes back on rollback
+        db.execute(text(f"DROP INDEX {INDEX_NAME}"))
+        try:
+            for name, query in pages.items():
+                results[name]["without_index"] = measure(db, query, max(1, args.repeat // 10))
+        finally:
+            db.rollback()
+
+    for name, result in results.items():
+        with_index, without_index = result["with_index"], result["without_index"]
+        print(f"{name:>13}: {with_index['median_ms']:8.3f} ms ({with_index['plan']}, {with_index['buffers']} buffers)"
+              f"  without index {without_index['median_ms']:9.3f} ms ({without_index['plan']}, {without_index['buffers']} buffers)")
+    return {"authors": authors, "results": results}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reset", action="store_true", help="Drop, recreate and seed every table first")
+    parser.add_argument("--users", type=int, default=10_000, help="Users to seed")
+    parser.add_argument("--posts", type=int, default=1_000_000, help="Posts to seed")
+    parser.add_argument("--votes", type=int, default=1_000_000, help="Votes to seed")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the dataset")
+    parser.add_argument("--limit", type=int, default=10, help="Posts per page")
+    parser.add_argument("--depth", type=int, default=50, help="Pages followed through the cursor for the deep page")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed runs per query with the index")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.reset:
+        started = time.perf_counter()
+        models.Base.metadata.drop_all(bind=engine)
+        models.Base.metadata.create_all(bind=engine)
+        datagen.generate(engine, args.users, args.posts, args.votes, seed=args.seed)
+        print(f"seeded in {time.perf_counter() - started:.1f}s")
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@
 # scope = session: runs once every time uses pytest
 # scope = function: runs every function
 # Fixture for setting connection with database
+import os
+os.environ.setdefault("INTERNAL_ENDPOINTS_ENABLED", "true") # Off by default, read when app.main is imported
 from fastapi.testclient import TestClient
 import pytest
 from app.main import app
@@ -12,8 +14,10 @@ from app.config import settings
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.database import get_db, Base
-from app.oauth2 import create_access_token
+from app.database import get_db, get_session_factory, Base
+from app.oauth2 import create_access_token, revoked_tokens, token_cache, user_cache
+from app.replicas import recent_writers
+from app.ratelimit import limiter
 from app import models
 # Database set up for testing
 # Database config
@@ -35,6 +39,11 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 def session():
     Base.metadata.drop_all(bind=engine) # Drop all tables after running our code
     Base.metadata.create_all(bind=engine) # Create all tables before running our code
+    user_cache.clear() # IDs are reused once the tables are recreated
+    token_cache.clear()
+    revoked_tokens.clear()
+    recent_writers.clear()
+    limiter.clear()
     db = TestingSessionLocal()
     try:
         yield db
@@ -52,6 +61,8 @@ def client(session):
             session.close()
     # Override get_db with override_get_db for testing
     app.dependency_overrides[get_db] = override_get_db
+    # Streaming responses open their own sessions on the test database
+    app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
     # Specify the TestClient
     yield TestClient(app) # uses with yield, which we can specify what runs before and what runs after the yield,
     # run after our test finishes 
@@ -0,0 +1,30 @@
+from sqlalchemy import func, select
+
+from app import datagen, models
+from app.maintenance import find_vote_count_drift
+from tests.conftest import engine
+
+# Test the generator loads consistent, reproducible data
+def test_generate(session):
+    counts = datagen.generate(engine, users=20, posts=200, votes=1000, seed=7, log=lambda message: None)
+    assert session.scalar(select(func.count()).select_from(models.User)) == 20
+    assert session.scalar(select(func.count()).select_from(models.Post)) == 200
+    assert session.scalar(select(func.count()).select_from(models.Vote)) == counts["votes"]
+    assert abs(counts["votes"] - 1000) <= 20 # Stochastic rounding stays close to the target
+    assert find_vote_count_drift(session) == []
+
+    first = session.execute(select(models.Post.title, models.Post.owner_id, models.Post.vote_count).order_by(models.Post.id)).all()
+    session.rollback()
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    datagen.generate(engine, users=20, posts=200, votes=1000, seed=7, log=lambda message: None)
+    assert session.execute(select(models.Post.title, models.Post.owner_id, models.Post.vote_count).order_by(models.Post.id)).all() == first
+
+    # The vote count trigger is back on after the load
+    vote = session.scalars(select(models.Vote)).first()
+    post = session.get(models.Post, vote.post_id)
+    votes = post.vote_count
+    session.delete(vote)
+    session.commit()
+    session.refresh(post)
+    assert post.vote_count == votes - 1
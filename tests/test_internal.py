@@ -0,0 +1,21 @@
+from sqlalchemy import create_engine
+
+from app.pool import engine_options
+from .conftest import SQLALCHEMY_DATABASE_URL
+
+# Test the connection pool statistics endpoint
+def test_pool_stats(client, monkeypatch):
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options()) # Instrumented pool on the test database
+    monkeypatch.setattr("app.routers.internal.engine", engine)
+    try:
+        with engine.connect(): # Hold one connection so it shows as checked out
+            res = client.get("/internal/pool")
+    finally:
+        engine.dispose()
+
+    pool = res.json()["sync"]
+    assert res.status_code == 200
+    assert pool["mode"] == "queue"
+    assert pool["checked_out"] >= 1
+    assert pool["wait_seconds"]["count"] >= 1
+    assert res.json()["async"] is None # Async engine is disabled by default
@@ -0,0 +1,24 @@
+from app.metrics import request_metrics
+
+# Test that /metrics reports requests by route template and status
+def test_metrics(authorized_client, test_posts):
+    post_id = test_posts[0].id # Read before requests close the session
+    request_metrics.reset()
+
+    authorized_client.get(f"/posts/{post_id}")
+    authorized_client.get(f"/posts/{post_id + 1}")
+    authorized_client.get("/posts/999999")
+    authorized_client.get("/no/such/path")
+
+    res = authorized_client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    lines = res.text.splitlines()
+    assert "http_requests_in_flight 1" in lines # The scrape itself
+    assert 'http_request_duration_seconds_count{method="GET",route="/posts/{post_id}"} 3' in lines
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/posts/{post_id}",le="+Inf"} 3' in lines
+    assert 'http_responses_total{method="GET",route="/posts/{post_id}",status="200"} 2' in lines
+    assert 'http_responses_total{method="GET",route="/posts/{post_id}",status="404"} 1' in lines
+    assert 'http_responses_total{method="GET",route="unmatched",status="404"} 1' in lines
+    assert not any(f"/posts/{post_id}" in line for line in lines) # Raw paths never become labels
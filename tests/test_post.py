@@ -2,6 +2,14 @@ from sqlalchemy import func
 from app import schemas
 import pytest
 from app import models
+from sqlalchemy import event
+from app.config import settings
+from tests.conftest import engine
+from app import bulk_import
+import json
+from datetime import timedelta
+from app import trending
+from app.trending import TrendingRefresher
 
 # Test the function of getting all post in post.py
 def test_get_all_post(authorized_client, test_posts):
@@ -10,6 +18,228 @@ def test_get_all_post(authorized_client, test_posts):
     assert len(res.json()) == len(test_posts)
     assert res.status_code == 200
 
+# Test paging through all posts with the keyset cursor
+def test_get_posts_cursor_pagination(authorized_client, test_posts):
+    first = authorized_client.get("/posts/", params={"limit": 3})
+    cursor = first.headers.get("X-Next-Cursor")
+    assert first.status_code == 200
+    assert cursor is not None
+
+    second = authorized_client.get("/posts/", params={"limit": 3, "cursor": cursor})
+    ids = [item["post"]["id"] for item in first.json() + second.json()]
+    assert second.status_code == 200
+    assert "X-Next-Cursor" not in second.headers # Last page is not full
+    assert sorted(ids) == sorted(post.id for post in test_posts) # Every post exactly once
+
+# Test sending a malformed cursor
+def test_get_posts_invalid_cursor(authorized_client, test_posts):
+    res = authorized_client.get("/posts/", params={"cursor": "not-a-cursor"})
+    assert res.status_code == 400
+
+# Test searching posts by word prefix over title and content
+@pytest.mark.parametrize("search, search_mode, expected", [
+    ("Post1", "prefix", ["Post1"]),
+    ("Cont", "prefix", ["Post1", "Post2", "Post3", "Post4"]),
+    ("Content3", "fulltext", ["Post3"]),
+    ("Post4", "title", ["Post4"]),
+    ("   ", "prefix", ["Post1", "Post2", "Post3", "Post4"]),
+    ("%%", "prefix", []),
+])
+def test_search_posts(authorized_client, test_posts, search, search_mode, expected):
+    res = authorized_client.get("/posts/", params={"search": search, "search_mode": search_mode})
+    titles = sorted(item["post"]["title"] for item in res.json())
+    assert res.status_code == 200
+    assert titles == expected
+
+# Test ranking full-text results by relevance
+def test_search_posts_relevance(authorized_client, test_posts, session):
+    session.add(models.Post(title="Python python", content="python tips", owner_id=test_posts[0].owner_id))
+    session.add(models.Post(title="Other", content="python", owner_id=test_posts[0].owner_id))
+    session.commit()
+    res = authorized_client.get("/posts/", params={"search": "python", "sort": "relevance"})
+    assert res.status_code == 200
+    assert [item["post"]["title"] for item in res.json()] == ["Python python", "Other"]
+
+# Test relevance sort without a search
+def test_relevance_sort_requires_search(authorized_client, test_posts):
+    res = authorized_client.get("/posts/", params={"sort": "relevance"})
+    assert res.status_code == 400
+
+# Test conditional GET of a single post with ETag / If-None-Match
+def test_get_one_post_not_modified(authorized_client, test_posts):
+    url = f"/posts/{test_posts[0].id}"
+    etag = authorized_client.get(url).headers["ETag"]
+
+    res = authorized_client.get(url, headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+
+    # A vote changes the version of the post
+    authorized_client.post("/vote/", json={"post_id": test_posts[0].id, "dir": 1})
+    res = authorized_client.get(url, headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+# Test the collection ETag of the post list
+def test_get_all_post_not_modified(authorized_client, test_posts):
+    etag = authorized_client.get("/posts/").headers["ETag"]
+    assert authorized_client.get("/posts/", headers={"If-None-Match": etag}).status_code == 304
+
+    # Editing any post on the page changes the collection ETag
+    authorized_client.put(f"/posts/{test_posts[0].id}", json={"title": "Changed", "content": "Changed"})
+    assert authorized_client.get("/posts/", headers={"If-None-Match": etag}).status_code == 200
+
+# Test that listing posts loads their owners without one query per post
+@pytest.mark.parametrize("loading, statements", [
+    ("joined", 1), # posts LEFT OUTER JOIN users
+    ("selectin", 2), # posts, then users WHERE id IN (...)
+])
+def test_get_all_post_statement_count(authorized_client, test_posts, monkeypatch, loading, statements):
+    monkeypatch.setattr(settings, "post_owner_loading", loading)
+    authorized_client.get("/posts/") # Warm the token and user caches
+
+    executed = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        res = authorized_client.get("/posts/")
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert res.status_code == 200
+    assert len(res.json()) == len(test_posts)
+    assert all(item["post"]["owner"]["email"] for item in res.json())
+    assert len(executed) == statements
+
+# Test sparse fieldsets: unrequested columns are neither fetched nor returned
+def test_get_all_post_sparse_fields(authorized_client, test_posts):
+    authorized_client.get("/posts/") # Warm the token and user caches
+
+    executed = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        res = authorized_client.get("/posts/", params={"fields": "title,owner"})
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert res.status_code == 200
+    assert len(res.json()) == len(test_posts)
+    for item in res.json():
+        assert set(item) == {"post", "votes"}
+        assert set(item["post"]) == {"id", "title", "owner"}
+        assert item["post"]["owner"]["email"]
+    assert len(executed) == 1
+    assert "posts.content" not in executed[0]
+
+    # Without the owner there is no join on users
+    res = authorized_client.get("/posts/", params={"fields": "title"})
+    assert set(res.json()[0]["post"]) == {"id", "title"}
+
+    # Each fieldset has its own ETag
+    assert res.headers["ETag"] != authorized_client.get("/posts/").headers["ETag"]
+
+# Test an unknown sparse field
+def test_get_all_post_unknown_field(authorized_client, test_posts):
+    res = authorized_client.get("/posts/", params={"fields": "title,password"})
+    assert res.status_code == 400
+
+# Test bulk import of NDJSON with per-row errors, committed in chunks
+def test_bulk_import_ndjson(authorized_client, test_user, session, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_import_chunk_size", 2)
+    monkeypatch.setattr(settings, "bulk_import_max_errors", 1)
+
+    body = "\n".join([
+        '{"title": "A", "content": "a"}',
+        '{"title": "B", "content": "b", "published": false}',
+        '{"title": "C"}', # Missing content
+        'not json',
+        '',
+        '{"title": "D", "content": "d"}', # Last line without newline
+    ])
+    res = authorized_client.post("/posts/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert res.status_code == 200
+    report = schemas.BulkImportResult(**res.json())
+    assert (report.imported, report.failed) == (3, 2)
+    assert [error.line for error in report.errors] == [3] # Capped by bulk_import_max_errors
+
+    posts = session.query(models.Post).order_by(models.Post.id).all()
+    assert [(post.title, post.published, post.owner_id) for post in posts] == [
+        ("A", True, test_user["id"]), ("B", False, test_user["id"]), ("D", True, test_user["id"])
+    ]
+
+# Test bulk import of CSV, including quoted fields spanning lines
+def test_bulk_import_csv(authorized_client, session):
+    body = 'title,content,published\r\nA,"multi\nline, with ""quotes""",\r\nB,b,nope\r\nC,c,false\r\n'
+    res = authorized_client.post("/posts/bulk", content=body.encode(), headers={"Content-Type": "text/csv"})
+    assert res.status_code == 200
+    assert res.json()["imported"] == 2
+    assert [error["line"] for error in res.json()["errors"]] == [4]
+
+    posts = session.query(models.Post).order_by(models.Post.id).all()
+    assert [(post.title, post.content, post.published) for post in posts] == [
+        ("A", 'multi\nline, with "quotes"', True), ("C", "c", False)
+    ]
+
+# Test that a bare quote inside an unquoted CSV field does not swallow the following records
+def test_bulk_import_csv_bare_quote(authorized_client, session):
+    body = 'title,content\nTV,"5"" screen"\nTablet,10" screen\nPhone,6 inch\n'
+    res = authorized_client.post("/posts/bulk", content=body.encode(), headers={"Content-Type": "text/csv"})
+    assert res.status_code == 200
+    assert res.json()["imported"] == 3
+    assert res.json()["errors"] == []
+
+    posts = session.query(models.Post).order_by(models.Post.id).all()
+    assert [(post.title, post.content) for post in posts] == [
+        ("TV", '5" screen'), ("Tablet", '10" screen'), ("Phone", "6 inch")
+    ]
+
+# Test the multi-row INSERT used when the driver has no COPY
+def test_bulk_import_insert_fallback(test_user, session, monkeypatch):
+    bulk_import.write_rows(session, [{"title": "A", "content": "", "published": True, "owner_id": test_user["id"]}], use_copy=False)
+    session.commit()
+    assert session.query(models.Post).one().content == ""
+
+    # Chunks larger than the bind parameter limit allows are split into several INSERTs
+    monkeypatch.setattr(bulk_import, "INSERT_BATCH_ROWS", 2)
+    bulk_import.write_rows(session, [{"title": str(index), "content": "", "published": True, "owner_id": test_user["id"]} for index in range(5)], use_copy=False)
+    session.commit()
+    assert session.query(models.Post).count() == 6
+
+# Test the NDJSON export streams through a server-side cursor and applies its filters
+def test_export_posts(authorized_client, test_posts, session, monkeypatch):
+    monkeypatch.setattr(settings, "export_chunk_rows", 3)
+    test_posts[1].published = False
+    session.commit()
+    ids = sorted(post.id for post in test_posts) # Read before requests close the session
+    unpublished_id, created_at = test_posts[1].id, test_posts[0].created_at
+    authorized_client.post("/vote/", json={"post_id": ids[0], "dir": 1})
+
+    cursor_names = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        cursor_names.append(cursor.name)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        res = authorized_client.get("/posts/export")
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert [row["id"] for row in rows] == ids
+    assert rows[0]["votes"] == 1
+    assert set(rows[0]) == {"id", "title", "content", "published", "owner_id", "created_at", "votes"}
+    assert cursor_names[-1] is not None # Named cursor, i.e. DECLARE ... CURSOR on the server
+
+    res = authorized_client.get("/posts/export", params={"published": False})
+    assert [json.loads(line)["id"] for line in res.text.splitlines()] == [unpublished_id]
+
+    res = authorized_client.get("/posts/export", params={"created_after": (created_at + timedelta(days=1)).isoformat()})
+    assert res.text == ""
+
 # Test unauthorized user get all post
 def test_unauthorized_user_get_all_post(client, test_posts):
     res = client.get("/posts/")
@@ -123,4 +353,47 @@ def test_update_unauthorized(client, test_user, test_posts, session):
     res = client.put(f"/posts/{post_id}", json = data)  # Non exsisting post
 
     assert res.status_code == 401
-    assert res.json().get('detail') == 'Not authenticated'
\ No newline at end of file
+    assert res.json().get('detail') == 'Not authenticated'
+
+# Test that trending ranks by time-decayed votes and only rewrites what changed
+def test_trending_posts(authorized_client, test_posts, test_user2, session):
+    ids = [post.id for post in test_posts] # Read before requests close the session
+    test_posts[2].created_at -= timedelta(hours=24) # Two half-lives old
+    test_posts[3].created_at -= timedelta(days=30) # Outside the window
+    session.commit()
+    session.add_all([
+        models.Vote(post_id=ids[2], user_id=test_user2['id']),
+        models.Vote(post_id=ids[1], user_id=test_user2['id']),
+    ])
+    session.commit()
+
+    assert trending.refresh(session) == 3 # Every post of the window is new
+    assert trending.refresh(session) == 0 # Nothing changed
+
+    res = authorized_client.get("/posts/trending")
+    assert res.status_code == 200
+    # 1 vote now beats no votes now beats 1 vote a day ago, the old post is not ranked
+    assert [post["post"]["id"] for post in res.json()] == [ids[1], ids[0], ids[2]]
+    assert res.json()[0]["votes"] == 1
+
+    authorized_client.post("/vote/", json={"post_id": ids[0], "dir": 1})
+    session.add(models.Vote(post_id=ids[0], user_id=test_user2['id']))
+    session.commit()
+    assert trending.refresh(session) == 1 # Only the voted post is rewritten
+    res = authorized_client.get("/posts/trending", params={"limit": 1})
+    assert [(post["post"]["id"], post["votes"]) for post in res.json()] == [(ids[0], 2)]
+    assert authorized_client.get("/posts/trending", params={"limit": 0}).status_code == 422
+
+# Test that only one worker at a time holds the trending refresh lock
+def test_trending_refresh_leader(test_posts):
+    first, second = TrendingRefresher(engine, interval=60), TrendingRefresher(engine, interval=60)
+    connection = first.lead()
+    try:
+        assert connection is not None
+        assert second.lead() is None # Held by the first worker
+        assert first.refresh(connection, full=True) == len(test_posts)
+    finally:
+        connection.close() # The leader exits
+    takeover = second.lead()
+    assert takeover is not None
+    takeover.close()
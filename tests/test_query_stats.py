@@ -0,0 +1,34 @@
+import logging
+
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.query_stats import RepeatedStatementError, capture
+
+# Test the Server-Timing header of a request
+def test_server_timing_header(authorized_client, test_posts):
+    authorized_client.get("/posts/") # Warm the token and user caches
+
+    res = authorized_client.get("/posts/")
+    assert res.status_code == 200
+    db, app = [part.strip() for part in res.headers["Server-Timing"].split(",", 1)]
+    assert db.startswith("db;dur=")
+    assert f'desc="queries=1 rows={len(test_posts)}"' in db # posts JOIN users in one statement
+    assert app.startswith("app;dur=")
+
+# Test repeated statements are reported in warn mode and fail in raise mode
+def test_repeated_statements(session, test_posts, caplog):
+    query = select(models.Post).where(models.Post.id == test_posts[0].id)
+
+    with caplog.at_level(logging.WARNING, logger="app.query_stats"):
+        with capture(threshold=2, mode="warn") as stats:
+            for _ in range(4):
+                session.execute(query)
+    assert stats.statements == 4
+    assert len([record for record in caplog.records if "N+1" in record.getMessage()]) == 1
+
+    with pytest.raises(RepeatedStatementError):
+        with capture(threshold=2, mode="raise"):
+            for _ in range(3):
+                session.execute(query)
@@ -0,0 +1,61 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import ultils
+from app.config import settings
+from app.ratelimit import LocalBackend, limiter
+
+# Test that a bucket refills over time and that an attempt takes from all of its buckets or none
+def test_local_backend(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.ratelimit.time.monotonic", lambda: now[0])
+    backend = LocalBackend(max_keys=10)
+    take = lambda *limits: asyncio.run(backend.take(list(limits)))
+
+    assert take(("ip", 2, 1.0)) == 0
+    assert take(("ip", 2, 1.0)) == 0
+    assert take(("ip", 2, 1.0)) == 1.0 # Empty, one token back in a second
+    now[0] += 0.5
+    assert take(("ip", 2, 1.0), ("account", 5, 1.0)) == 0.5
+    assert len(backend) == 1 # The refused attempt charged neither bucket
+    now[0] += 0.5
+    assert take(("ip", 2, 1.0), ("account", 5, 1.0)) == 0
+
+    for index in range(20):
+        take((f"other{index}", 1, 1.0))
+    assert len(backend) == 10 # The least recently used buckets were dropped
+
+
+# Test that throttled logins and signups get a cheap 429, without a query or bcrypt call
+def test_login_and_signup_limited(client, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_account_burst", 2)
+    credentials = {'username': test_user['email'], 'password': 'wrong'}
+    assert client.post("/login", data=credentials).status_code == 403
+    assert client.post("/login", data=credentials).status_code == 403
+
+    async def no_bcrypt(*args):
+        raise AssertionError("bcrypt ran for a throttled attempt")
+    monkeypatch.setattr(ultils, "verify_async", no_bcrypt)
+    monkeypatch.setattr(ultils, "hash_async", no_bcrypt)
+
+    res = client.post("/login", data={**credentials, 'username': test_user['email'].upper()})
+    assert res.status_code == 429
+    assert res.headers["Retry-After"] == "10" # One attempt per 10s for an account
+    assert 'queries=0 ' in res.headers["Server-Timing"]
+
+    monkeypatch.setattr(settings, "rate_limit_ip_burst", 0) # This IP is out of attempts
+    res = client.post("/users/", json={'email': 'new@gmail.com', 'password': '123456'})
+    assert res.status_code == 429
+    assert limiter.stats()["rejected"] == 2
+
+# Test that clients behind a trusted proxy get their own IP bucket and cannot forge one
+def test_client_ip_behind_proxy(client, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_ip_burst", 1)
+    monkeypatch.setattr(settings, "rate_limit_trusted_proxies", ["10.0.0.0/8"])
+    proxied = TestClient(client.app, client=("10.0.0.1", 50000))
+    signup = lambda index, forwarded: proxied.post("/users/", json={'email': f'user{index}@gmail.com', 'password': '123456'}, headers={"X-Forwarded-For": forwarded})
+
+    assert signup(1, "203.0.113.7").status_code == 201
+    assert signup(2, "203.0.113.8, 10.0.0.2").status_code == 201 # Another client, through a second trusted proxy
+    assert signup(3, "198.51.100.1, 203.0.113.7").status_code == 429 # A forged left entry does not help
@@ -0,0 +1,36 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import startup
+from app.main import app
+from .conftest import engine
+
+# Test that check mode refuses a database that was not migrated to the head revision
+def test_check_schema(session):
+    with pytest.raises(startup.SchemaMismatchError):
+        startup.check_schema(engine) # Tables made by create_all, no alembic_version
+
+    head, = startup.alembic_heads()
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) PRIMARY KEY)"))
+        connection.execute(text("INSERT INTO alembic_version VALUES (:head)"), {"head": head})
+    try:
+        startup.check_schema(engine)
+        startup.prepare_schema(engine, "check")
+        assert startup.timings["schema_mode"] == "check"
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text("DROP TABLE alembic_version"))
+
+
+# Test that booting the app records its import and boot times
+def test_startup_timings(monkeypatch):
+    monkeypatch.setattr("app.main.settings.startup_schema_mode", "off")
+    monkeypatch.setattr("app.main.settings.trending_enabled", False)
+    with TestClient(app) as client: # Runs the lifespan
+        res = client.get("/internal/startup")
+    assert res.status_code == 200
+    timings = res.json()
+    assert timings["schema_mode"] == "off"
+    assert 0 < timings["import_seconds"] <= timings["boot_seconds"]
@@ -1,7 +1,11 @@
 import jwt
 from app.config import settings
 from app import schemas
+from app.oauth2 import create_access_token
 import pytest
+from app import models
+from app.oauth2 import user_cache
+from app.oauth2 import token_cache
 
     
 
@@ -41,4 +45,59 @@ def test_login_user(client, test_user):
 def test_incorrect_login(test_user, client, email, password, status_code):
     res = client.post("/login", data = {'username': email, 'password':password}) # wrong password
     assert res.status_code == status_code
-    assert res.json().get('detail') == "Invalid Credentials"
\ No newline at end of file
+    assert res.json().get('detail') == "Invalid Credentials"
+
+# Test that the authenticated user lookup is served from the cache
+def test_current_user_cache(authorized_client, test_user, session):
+    authorized_client.get("/posts/")
+    authorized_client.get("/posts/")
+    assert user_cache.stats()["hits"] == 1 # Second request skips the DB lookup
+
+    # Changing the user through the ORM evicts it
+    user = session.get(models.User, test_user['id'])
+    user.email = "joe2@gmail.com"
+    session.commit()
+    assert user_cache.get(test_user['id']) is None
+
+# Test that signups get a 503 instead of queueing when the hashing executor is saturated
+def test_create_user_hashing_busy(client, monkeypatch):
+    monkeypatch.setattr(settings, "hashing_max_pending", 0)
+    res = client.post("/users/", json = {'email':'busy@gmail.com', 'password': '123456'})
+    assert res.status_code == 503
+    assert res.headers.get("Retry-After") == "1"
+
+# Test that a verified token is reused and stops working once revoked
+def test_token_cache_and_logout(authorized_client, test_posts):
+    assert authorized_client.get("/posts/").status_code == 200
+    assert authorized_client.get("/posts/").status_code == 200
+    assert token_cache.stats()["hits"] == 1 # Second request skipped jwt.decode
+
+    assert authorized_client.post("/logout").status_code == 204
+    res = authorized_client.get("/posts/")
+    assert res.status_code == 401
+    assert res.json().get('detail') == "Could not validate credentials"
+
+# Test paging through one user's posts with the keyset cursor
+def test_get_user_posts(authorized_client, test_user, test_user2, test_posts, vote_post):
+    own_ids = sorted((post.id for post in test_posts if post.owner_id == test_user['id']), reverse=True)
+
+    first = authorized_client.get(f"/users/{test_user['id']}/posts", params={"limit": 2})
+    assert first.status_code == 200
+    cursor = first.headers.get("X-Next-Cursor")
+    assert cursor is not None
+    second = authorized_client.get(f"/users/{test_user['id']}/posts", params={"limit": 2, "cursor": cursor})
+    assert "X-Next-Cursor" not in second.headers # Last, partial page
+
+    posts = first.json() + second.json()
+    assert [post["post"]["id"] for post in posts] == own_ids # Same created_at, newest id first
+    assert {post["post"]["owner"]["id"] for post in posts} == {test_user['id']} # Post 4 of user 2 is left out
+    assert {post["post"]["id"]: post["votes"] for post in posts}[own_ids[-1]] == 1
+
+    assert authorized_client.get(f"/users/{test_user['id']}/posts", params={"limit": 2}, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    assert authorized_client.get("/users/999999/posts").status_code == 404
+
+# Test that a valid token whose user no longer exists is rejected
+def test_token_of_deleted_user(client):
+    token = create_access_token({"user_id": 999999})
+    res = client.get("/posts/", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 401
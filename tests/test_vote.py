@@ -1,6 +1,12 @@
 # Fixture for creating a post with 1 vote
 import pytest
 from app import models
+from app.maintenance import find_vote_count_drift, repair_vote_counts
+from app.config import settings
+from app.routers import vote as vote_router
+from app.routers import post as post_router
+from app.vote_buffer import VoteBuffer
+from tests.conftest import TestingSessionLocal
 
 
 
@@ -43,4 +49,98 @@ def test_vote_unauthorized(client, test_posts):
     res = client.post("/vote/", json = data) # Client is not authorized
 
     assert res.status_code == 401
-    assert res.json().get('detail') == 'Not authenticated'
\ No newline at end of file
+    assert res.json().get('detail') == 'Not authenticated'
+
+# Test that the denormalized vote counter follows votes and unvotes
+def test_vote_count_follows_votes(authorized_client, test_posts):
+    post_id = test_posts[0].id
+    authorized_client.post("/vote/", json = {"post_id": post_id, "dir": 1})
+    assert authorized_client.get(f"/posts/{post_id}").json()["votes"] == 1
+
+    authorized_client.post("/vote/", json = {"post_id": post_id, "dir": 0})
+    assert authorized_client.get(f"/posts/{post_id}").json()["votes"] == 0
+
+# Test the vote count consistency check and repair
+def test_repair_vote_counts(session, test_posts, vote_post):
+    assert find_vote_count_drift(session) == [] # Trigger kept the counter exact
+    session.query(models.Post).filter(models.Post.id == test_posts[1].id).update({"vote_count": 5})
+    session.commit()
+
+    assert find_vote_count_drift(session) == [(test_posts[1].id, 5, 0)]
+    assert repair_vote_counts(session) == 1
+    assert find_vote_count_drift(session) == []
+
+# Test applying several votes in one request
+def test_vote_batch(authorized_client, test_posts, vote_post):
+    ids = [post.id for post in test_posts] # Read before the client closes the session
+    data = [
+        {"post_id": ids[0], "dir": 1}, # Already voted by vote_post
+        {"post_id": ids[1], "dir": 1},
+        {"post_id": ids[2], "dir": 0}, # Never voted
+        {"post_id": 3232323, "dir": 1},
+        {"post_id": ids[3], "dir": 0},
+        {"post_id": ids[3], "dir": 1}, # Last item for a post wins
+    ]
+    res = authorized_client.post("/vote/batch", json = data)
+    assert res.status_code == 200
+    assert [item["status"] for item in res.json()] == [
+        "already_voted", "voted", "not_voted", "post_not_found", "superseded", "voted"
+    ]
+    assert authorized_client.get(f"/posts/{ids[1]}").json()["votes"] == 1
+
+    res = authorized_client.post("/vote/batch", json = [{"post_id": ids[0], "dir": 0}])
+    assert res.json()[0]["status"] == "removed"
+
+# Test an empty vote batch
+def test_vote_batch_empty(authorized_client):
+    res = authorized_client.post("/vote/batch", json = [])
+    assert res.status_code == 422
+
+# Test buffering votes in write-behind mode and flushing them in a batch
+def test_vote_write_behind(authorized_client, test_posts, session, monkeypatch):
+    buffer = VoteBuffer(TestingSessionLocal, flush_interval=3600, max_items=1000) # Only flushed explicitly
+    monkeypatch.setattr(settings, "vote_write_behind", True)
+    monkeypatch.setattr(vote_router, "vote_buffer", buffer)
+    monkeypatch.setattr(post_router, "vote_buffer", buffer)
+    post_id = test_posts[0].id
+
+    try:
+        assert authorized_client.post("/vote/", json = {"post_id": post_id, "dir": 1}).status_code == 201
+        assert session.query(models.Vote).count() == 0 # Not written yet
+        assert authorized_client.get(f"/posts/{post_id}").json()["votes"] == 1 # Reads see the pending vote
+        assert authorized_client.post("/vote/", json = {"post_id": post_id, "dir": 1}).status_code == 409
+
+        assert buffer.flush() == 1
+        assert session.query(models.Vote).count() == 1
+        assert authorized_client.get(f"/posts/{post_id}").json()["votes"] == 1
+
+        # An unvote followed by a vote cancels out in the buffer
+        authorized_client.post("/vote/", json = {"post_id": post_id, "dir": 0})
+        authorized_client.post("/vote/", json = {"post_id": post_id, "dir": 1})
+        assert buffer.depth() == 0
+    finally:
+        buffer.stop()
+
+# Test that a vote buffered for a post deleted before the flush is dropped without blocking the others
+def test_vote_buffer_deleted_post(session, test_posts, test_user):
+    buffer = VoteBuffer(TestingSessionLocal, flush_interval=3600, max_items=1000)
+    deleted_id, kept_id = test_posts[0].id, test_posts[1].id
+    buffer.put(test_user['id'], deleted_id, 1)
+    buffer.put(test_user['id'], kept_id, 1)
+    session.query(models.Post).filter(models.Post.id == deleted_id).delete()
+    session.commit()
+
+    assert buffer.flush() == 2
+    assert buffer.depth() == 0 and buffer.failed_flushes == 0
+    assert [vote.post_id for vote in session.query(models.Vote)] == [kept_id]
+    buffer.stop()
+
+# Test that a batch is refused with 503 when buffered votes cannot be flushed first
+def test_vote_batch_flush_failed(authorized_client, test_posts, monkeypatch):
+    def failing_flush():
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(settings, "vote_write_behind", True)
+    monkeypatch.setattr(vote_router.vote_buffer, "flush", failing_flush)
+    res = authorized_client.post("/vote/batch", json = [{"post_id": test_posts[0].id, "dir": 1}])
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"